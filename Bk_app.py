@@ -5,11 +5,14 @@ import os
 from dotenv import load_dotenv
 import threading
 import time as time_module
+from registro import configurar_logging
 
 # Carrega variáveis de ambiente
 load_dotenv()
 
 app = Flask(__name__)
+# Eventos do verificador vão para a fila de logging (não bloqueiam em stdout)
+configurar_logging(app)
 
 # Configuração do banco de dados
 # Para desenvolvimento local, usa SQLite
@@ -59,7 +62,7 @@ def verificador_horarios():
             if dia_atual in [d.strip() for d in dias]:
                 # Verifica se é a hora exata
                 if horario.hora == hora_atual and not esta_regando:
-                    print(f"🕐 {datetime.now()}: É hora de regar! ({horario.duracao}s)")
+                    app.logger.info(f"🕐 {datetime.now()}: É hora de regar! ({horario.duracao}s)", extra={'chave': 'rega_iniciada'})
                     esta_regando = True
                     ultimo_comando = {
                         "regar": True,
@@ -79,7 +82,7 @@ def verificador_horarios():
                         "timestamp": datetime.now().isoformat(),
                         "status": "concluido"
                     }
-                    print(f"✅ Rega concluída às {datetime.now().strftime('%H:%M')}")
+                    app.logger.info(f"✅ Rega concluída às {datetime.now().strftime('%H:%M')}", extra={'chave': 'rega_concluida'})
         
         time_module.sleep(60)  # Verifica a cada minuto
 
@@ -268,7 +271,7 @@ def adicionar_horario():
     try:
         db.session.add(novo_horario)
         db.session.commit()
-        print(f"✅ Novo horário adicionado: {data['hora']} - {data.get('duracao', 600)}s")
+        app.logger.info(f"✅ Novo horário adicionado: {data['hora']} - {data.get('duracao', 600)}s")
         return jsonify({"sucesso": True, "id": novo_horario.id})
     except Exception as e:
         db.session.rollback()
@@ -0,0 +1,62 @@
+"""Cálculos sobre os horários de rega (sem dependência do Flask).
+
+Os horários são avaliados em "segundos da semana" (segunda-feira 00:00 = 0),
+o que permite responder tanto "deve regar agora?" quanto "quando muda o
+estado?" com a mesma lista de intervalos.
+"""
+from datetime import datetime
+
+SEGUNDOS_DIA = 24 * 60 * 60
+SEGUNDOS_SEMANA = 7 * SEGUNDOS_DIA
+
+# Índices compatíveis com datetime.weekday() (segunda = 0)
+DIAS_SEMANA = {'Seg': 0, 'Ter': 1, 'Qua': 2, 'Qui': 3, 'Sex': 4, 'Sab': 5, 'Dom': 6}
+
+
+def segundos_da_semana(momento: datetime) -> float:
+    return (momento.weekday() * SEGUNDOS_DIA
+            + momento.hour * 3600 + momento.minute * 60 + momento.second
+            + momento.microsecond / 1_000_000)
+
+
+def intervalos_semana(horarios):
+    """Gera (inicio, fim) em segundos da semana para cada dia de cada horário.
+
+    O fim é limitado à meia-noite do próprio dia, igual à checagem original do
+    endpoint da ESP32, que só considera os horários do dia corrente.
+    """
+    for horario in horarios:
+        inicio_dia = horario.hora.hour * 3600 + horario.hora.minute * 60 + horario.hora.second
+        for dia in horario.dias_semana.split(','):
+            indice = DIAS_SEMANA.get(dia.strip())
+            if indice is None:
+                continue
+            inicio = indice * SEGUNDOS_DIA + inicio_dia
+            fim = min(inicio + horario.duracao * 60, (indice + 1) * SEGUNDOS_DIA)
+            yield inicio, fim
+
+
+def deve_regar(horarios, agora: datetime) -> bool:
+    return regando(intervalos_semana(horarios), agora)
+
+
+def regando(intervalos, agora: datetime) -> bool:
+    """Se `agora` cai em algum dos intervalos (inicio, fim) em segundos da semana."""
+    agora_s = segundos_da_semana(agora)
+    return any(inicio <= agora_s < fim for inicio, fim in intervalos)
+
+
+def segundos_ate_proxima_transicao(horarios, agora: datetime):
+    """Segundos até o próximo início ou fim de rega, ou None se não houver horários."""
+    return segundos_ate_proxima_transicao_intervalos(intervalos_semana(horarios), agora)
+
+
+def segundos_ate_proxima_transicao_intervalos(intervalos, agora: datetime):
+    agora_s = segundos_da_semana(agora)
+    proxima = None
+    for inicio, fim in intervalos:
+        for instante in (inicio, fim):
+            delta = (instante - agora_s) % SEGUNDOS_SEMANA
+            if delta > 0 and (proxima is None or delta < proxima):
+                proxima = delta
+    return proxima
@@ -6,10 +6,13 @@ from dotenv import load_dotenv
 import threading
 import time as time_module
 import pytz
+from registro import configurar_logging
 
 load_dotenv()
 
 app = Flask(__name__)
+# Eventos do verificador vão para a fila de logging (não bloqueiam em stdout)
+configurar_logging(app)
 
 # Configuração do fuso horário brasileiro
 TIMEZONE = pytz.timezone('America/Sao_Paulo')
@@ -74,7 +77,7 @@ def verificador_horarios():
                     
                     if dia_pt in dias:
                         if horario.hora == hora_atual and not esta_regando:
-                            print(f"🕐 {agora.strftime('%d/%m/%Y %H:%M:%S')}: É hora de regar! ({horario.duracao}s)")
+                            app.logger.info(f"🕐 {agora.strftime('%d/%m/%Y %H:%M:%S')}: É hora de regar! ({horario.duracao}s)", extra={'chave': 'rega_iniciada'})
                             esta_regando = True
                             ultimo_comando = {
                                 "regar": True, 
@@ -91,9 +94,9 @@ def verificador_horarios():
                                 "timestamp": agora_br().isoformat(), 
                                 "status": "concluido"
                             }
-                            print(f"✅ Rega concluída às {agora_br().strftime('%d/%m/%Y %H:%M:%S')}")
+                            app.logger.info(f"✅ Rega concluída às {agora_br().strftime('%d/%m/%Y %H:%M:%S')}", extra={'chave': 'rega_concluida'})
         except Exception as e:
-            print(f"❌ Erro no verificador: {e}")
+            app.logger.exception(f"❌ Erro no verificador: {e}", extra={'chave': 'erro_verificador'})
         time_module.sleep(60)
 
 threading.Thread(target=verificador_horarios, daemon=True).start()
@@ -138,7 +141,7 @@ def adicionar_horario():
     try:
         db.session.add(novo_horario)
         db.session.commit()
-        print(f"✅ Novo horário: {data['hora']} (Brasília)")
+        app.logger.info(f"✅ Novo horário: {data['hora']} (Brasília)")
         return jsonify({"sucesso": True, "id": novo_horario.id})
     except Exception as e:
         db.session.rollback()
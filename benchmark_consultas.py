@@ -0,0 +1,100 @@
+"""Micro-benchmark das consultas sem ORM (consultas.py).
+
+Monta um banco SQLite temporário com usuários e horários variados e mede, por
+chamada, tempo de CPU e pico de memória alocada do caminho Core e do caminho
+ORM antigo, e o tempo de CPU da requisição inteira ao endpoint da ESP32. A
+equivalência dos dois caminhos é verificada em tests/test_consultas.py.
+
+Uso: python benchmark_consultas.py [repeticoes] [usuarios]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, time as hora
+
+_pasta = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_pasta, 'consultas.db')}"
+os.environ['INSTANCE_PATH'] = _pasta
+os.environ['ESP32_RATE_LIMIT_POR_MINUTO'] = str(10 ** 9)
+os.environ['ESP32_RATE_LIMIT_RAJADA'] = str(10 ** 9)
+os.environ['LOG_ARQUIVO'] = os.devnull
+
+import agenda  # noqa: E402
+import app as aplicacao  # noqa: E402
+from app import Horario, Usuario, db  # noqa: E402
+from consultas import ConsultasORM, horarios_para_json  # noqa: E402
+
+
+def popular(usuarios: int, semente: int = 0):
+    rng = random.Random(semente)
+    dias = list(agenda.DIAS_SEMANA)
+    with aplicacao.app.app_context():
+        db.create_all()
+        for i in range(usuarios):
+            usuario = Usuario(nome=f'u{i}', email=f'u{i}@bench', senha_hash='x',
+                              esp32_api_key=f'chave{i:05d}' if i % 10 else None)
+            db.session.add(usuario)
+            db.session.flush()
+            for _ in range(rng.choice([0, 1, 3, 6, 12])):
+                db.session.add(Horario(hora=hora(rng.randrange(24), rng.randrange(60)),
+                                       duracao=rng.randrange(1, 180),
+                                       dias_semana=','.join(rng.sample(dias, rng.randrange(1, 8))),
+                                       ativo=rng.random() < 0.8,
+                                       usuario_id=usuario.id))
+        db.session.commit()
+
+
+def medir(funcao, repeticoes: int):
+    """(µs de CPU por chamada, KiB de pico alocado por chamada)."""
+    funcao()
+    inicio = time.process_time()
+    for _ in range(repeticoes):
+        funcao()
+    cpu = (time.process_time() - inicio) / repeticoes * 1e6
+    tracemalloc.start()
+    pico = 0
+    for _ in range(min(repeticoes, 200)):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        funcao()
+        pico += tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return cpu, pico / min(repeticoes, 200) / 1024
+
+
+def executar(repeticoes: int = 2000, usuarios: int = 200):
+    popular(usuarios)
+
+    with aplicacao.app.test_request_context():
+        # O dispositivo com mais horários ativos (o caso mais caro para o ORM)
+        chave = max((f'chave{i:05d}' for i in range(usuarios) if i % 10),
+                    key=lambda c: len(aplicacao.consultas_rapidas.horarios_do_dispositivo(c)[3]))
+        usuario_id, _, _, _ = aplicacao.consultas_rapidas.horarios_do_dispositivo(chave)
+        for nome, consultas in (('ORM', ConsultasORM(Usuario, Horario)), ('Core', aplicacao.consultas_rapidas)):
+            def dispositivo():
+                _, _, _, horarios = consultas.horarios_do_dispositivo(chave)
+                agenda.deve_regar(horarios, datetime.utcnow())
+                db.session.remove()
+
+            def api_horarios():
+                horarios_para_json(consultas.horarios_ativos(usuario_id))
+                db.session.remove()
+
+            for rotulo, funcao in (('dispositivo', dispositivo), ('api_horarios', api_horarios)):
+                cpu, memoria = medir(funcao, repeticoes)
+                print(f'{nome:>4} {rotulo:<12}: {cpu:7.1f} µs de CPU, {memoria:6.1f} KiB de pico por chamada')
+
+    cliente = aplicacao.app.test_client()
+    original = aplicacao.consultas_rapidas
+    for nome, consultas in (('ORM', ConsultasORM(Usuario, Horario)), ('Core', original)):
+        aplicacao.consultas_rapidas = consultas
+        cpu, _ = medir(lambda: cliente.get('/api/esp32/status_rega', headers={'X-API-Key': chave}), repeticoes)
+        print(f'{nome:>4} requisição ESP32: {cpu:7.1f} µs de CPU')
+    aplicacao.consultas_rapidas = original
+
+
+if __name__ == '__main__':
+    executar(*(int(valor) for valor in sys.argv[1:3]))
@@ -0,0 +1,112 @@
+"""Benchmark de leituras concorrentes no endpoint da ESP32 com SQLite.
+
+Vários processos (como workers do gunicorn) consultam /api/esp32/status_rega
+enquanto outro processo grava horários sem parar. Roda com o SQLite padrão e
+com o perfil otimizado (sqlite_embarcado) e compara vazão e erros.
+
+Uso: python benchmark_sqlite.py [processos] [segundos] [dispositivos]
+"""
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+MODOS = {'padrao': '0', 'otimizado': '1'}
+
+
+def _importar_app(caminho_db, otimizado):
+    os.environ['DATABASE_URL'] = f'sqlite:///{caminho_db}'
+    os.environ['INSTANCE_PATH'] = os.path.dirname(caminho_db)
+    os.environ['SQLITE_OTIMIZADO'] = otimizado
+    os.environ['ESP32_RATE_LIMIT_POR_MINUTO'] = str(10 ** 9)
+    os.environ['ESP32_RATE_LIMIT_RAJADA'] = str(10 ** 9)
+    os.environ['LOG_ARQUIVO'] = os.devnull
+    import app
+    return app
+
+
+def _preparar(caminho_db, otimizado, dispositivos):
+    app = _importar_app(caminho_db, otimizado)
+    from datetime import time as hora
+    with app.app.app_context():
+        app.db.create_all()
+        for i in range(dispositivos):
+            usuario = app.Usuario(nome=f'u{i}', email=f'u{i}@bench', senha_hash='x', esp32_api_key=f'chave{i:05d}')
+            app.db.session.add(usuario)
+            app.db.session.flush()
+            for h in range(4):
+                app.db.session.add(app.Horario(hora=hora(h * 6, 0), duracao=15, dias_semana='Seg,Qua,Sex',
+                                               usuario_id=usuario.id))
+        app.db.session.commit()
+
+
+def _leitor(caminho_db, otimizado, dispositivos, inicio, fim, resultados):
+    app = _importar_app(caminho_db, otimizado)
+    cliente = app.app.test_client()
+    ok = erros = 0
+    while time.time() < inicio:
+        time.sleep(0.001)
+    while time.time() < fim:
+        resposta = cliente.get('/api/esp32/status_rega',
+                               headers={'X-API-Key': f'chave{random.randrange(dispositivos):05d}'})
+        if resposta.status_code == 200:
+            ok += 1
+        else:
+            erros += 1
+    resultados.put(('leitor', ok, erros))
+
+
+def _escritor(caminho_db, otimizado, dispositivos, inicio, fim, resultados):
+    app = _importar_app(caminho_db, otimizado)
+    ok = erros = 0
+    while time.time() < inicio:
+        time.sleep(0.001)
+    with app.app.app_context():
+        while time.time() < fim:
+            try:
+                horario = app.db.session.get(app.Horario, random.randrange(dispositivos * 4) + 1)
+                horario.ativo = not horario.ativo
+                app.db.session.commit()
+                ok += 1
+            except Exception:
+                app.db.session.rollback()
+                erros += 1
+    resultados.put(('escritor', ok, erros))
+
+
+def executar(processos: int = 4, segundos: float = 5.0, dispositivos: int = 200):
+    contexto = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as pasta:
+        for modo, otimizado in MODOS.items():
+            caminho_db = os.path.join(pasta, f'{modo}.db')
+            preparo = contexto.Process(target=_preparar, args=(caminho_db, otimizado, dispositivos))
+            preparo.start()
+            preparo.join()
+
+            resultados = contexto.Queue()
+            inicio = time.time() + 3  # tempo para os processos importarem o app
+            fim = inicio + segundos
+            filhos = [contexto.Process(target=_leitor, args=(caminho_db, otimizado, dispositivos, inicio, fim, resultados))
+                      for _ in range(processos)]
+            filhos.append(contexto.Process(target=_escritor,
+                                           args=(caminho_db, otimizado, dispositivos, inicio, fim, resultados)))
+            for filho in filhos:
+                filho.start()
+            totais = {'leitor': [0, 0], 'escritor': [0, 0]}
+            for _ in filhos:
+                papel, ok, erros = resultados.get()
+                totais[papel][0] += ok
+                totais[papel][1] += erros
+            for filho in filhos:
+                filho.join()
+
+            leituras, erros_leitura = totais['leitor']
+            escritas, erros_escrita = totais['escritor']
+            print(f"{modo:>9}: {leituras / segundos:7.0f} leituras/s ({erros_leitura} erros) com {processos} processos, "
+                  f"{escritas / segundos:5.0f} escritas/s ({erros_escrita} erros)")
+
+
+if __name__ == '__main__':
+    executar(*(tipo(valor) for tipo, valor in zip((int, float, int), sys.argv[1:])))
@@ -0,0 +1,81 @@
+"""Consultas quentes sem o ORM.
+
+O endpoint da ESP32 e /api/horarios só leem algumas colunas de `horario`;
+montar entidades ORM (identity map, instrumentação, backrefs) para isso custa
+mais que a própria consulta. Aqui as instruções Core são montadas uma vez, com
+`bindparam`, e reaproveitam o SQL compilado do cache do SQLAlchemy a cada
+execução. Elas rodam direto na conexão da sessão (mesma transação, mesmo
+roteamento para réplicas e mesma volta ao primário se a réplica falhar, via
+`SessaoRoteada.ler_na_conexao`), sem a camada ORM do `Session.execute`. O resultado
+são `Row`s (tuplas leves com acesso por nome: `.hora`, `.duracao`,
+`.dias_semana`), aceitas pelas funções de `agenda`.
+
+`ConsultasORM` é o caminho antigo, com entidades ORM, mantido como referência
+para os testes de equivalência e para `benchmark_consultas.py`.
+"""
+import sqlalchemy as sa
+
+from escalonamento import Restricao
+
+
+class ConsultasRapidas:
+    def __init__(self, db, usuario, horario):
+        self.db = db
+        u = usuario.__table__
+        h = horario.__table__
+        colunas = (h.c.id, h.c.hora, h.c.duracao, h.c.dias_semana, h.c.vazao_l_min)
+
+        self._horarios_ativos = (
+            sa.select(*colunas)
+            .where(h.c.usuario_id == sa.bindparam('usuario_id'), h.c.ativo == True)
+            .order_by(h.c.id)
+        )
+        # Uma ida ao banco para validar a chave e trazer os horários: o LEFT JOIN devolve
+        # uma linha com horário nulo quando a chave é válida mas não há horários ativos
+        self._horarios_dispositivo = (
+            sa.select(u.c.id.label('usuario_id'), u.c.max_zonas_simultaneas, u.c.vazao_maxima_l_min,
+                      u.c.fuso_horario, *colunas)
+            .select_from(u.outerjoin(h, sa.and_(h.c.usuario_id == u.c.id, h.c.ativo == True)))
+            .where(u.c.esp32_api_key == sa.bindparam('api_key'))
+            .order_by(h.c.id)
+        )
+
+    def horarios_ativos(self, usuario_id):
+        return self.db.session().ler_na_conexao(self._horarios_ativos, {'usuario_id': usuario_id})
+
+    def horarios_do_dispositivo(self, api_key):
+        """(usuario_id, restrição de vazão, fuso horário, horários ativos) da chave de API.
+
+        usuario_id é None se a chave não existir; o fuso é None quando a conta usa o padrão.
+        """
+        linhas = self.db.session().ler_na_conexao(self._horarios_dispositivo, {'api_key': api_key})
+        if not linhas:
+            return None, Restricao(), None, []
+        primeira = linhas[0]
+        restricao = Restricao(primeira.max_zonas_simultaneas, primeira.vazao_maxima_l_min)
+        return primeira.usuario_id, restricao, primeira.fuso_horario, [linha for linha in linhas if linha.id is not None]
+
+
+class ConsultasORM:
+    def __init__(self, usuario, horario):
+        self.Usuario = usuario
+        self.Horario = horario
+
+    def horarios_ativos(self, usuario_id):
+        return self.Horario.query.filter_by(usuario_id=usuario_id, ativo=True).all()
+
+    def horarios_do_dispositivo(self, api_key):
+        user = self.Usuario.query.filter_by(esp32_api_key=api_key).first()
+        if not user:
+            return None, Restricao(), None, []
+        return (user.id, user.restricao_rega, user.fuso_horario,
+                self.Horario.query.filter_by(usuario_id=user.id, ativo=True).all())
+
+
+def horarios_para_json(horarios):
+    return [{
+        'id': h.id,
+        'hora': h.hora.strftime('%H:%M'),
+        'duracao': h.duracao,
+        'dias_semana': h.dias_semana.split(',')
+    } for h in horarios]
@@ -0,0 +1,248 @@
+"""Simulação da demanda de água da frota inteira (planejamento de capacidade).
+
+Todos os horários ativos viram arrays NumPy e são expandidos em intervalos de
+"minutos da semana" (segunda-feira 00:00 = 0), com o mesmo corte à meia-noite
+usado pelo endpoint da ESP32 (ver `agenda.intervalos_semana`). As curvas de
+zonas simultâneas e de demanda (L/min) saem de somas de prefixo: +1 no minuto
+de início e -1 no minuto de fim de cada intervalo, acumulados com `cumsum`.
+Um ano é a curva semanal repetida a partir do dia da semana da data inicial.
+
+Os horários são cadastrados na hora local de cada conta; antes da soma cada um
+é convertido para UTC com o deslocamento do fuso da conta, então as curvas
+(e os rótulos) ficam todas no relógio UTC. Num período, o deslocamento é
+reavaliado dia a dia, acompanhando as mudanças de horário de verão.
+
+Com restrição de vazão na conta, os controladores executam as regas adiadas
+por `escalonamento`, não as pedidas; `FrotaHorarios.das_linhas` pode montar a
+frota com esses intervalos efetivos.
+"""
+import csv
+import io
+import itertools
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+
+import escalonamento
+from agenda import DIAS_SEMANA
+
+MINUTOS_DIA = 24 * 60
+MINUTOS_SEMANA = 7 * MINUTOS_DIA
+NOMES_DIAS = sorted(DIAS_SEMANA, key=DIAS_SEMANA.get)
+
+
+def mascaras_dias(dias_semana) -> np.ndarray:
+    """Strings como 'Seg,Qua,Sex' -> matriz (N, 7) de bool; cada string distinta é interpretada uma vez."""
+    unicos, inverso = np.unique(np.asarray(dias_semana, dtype=str), return_inverse=True)
+    mascaras = np.zeros((len(unicos), 7), dtype=bool)
+    for i, texto in enumerate(unicos):
+        for dia in texto.split(','):
+            indice = DIAS_SEMANA.get(dia.strip())
+            if indice is not None:
+                mascaras[i, indice] = True
+    return mascaras[inverso.reshape(-1)]
+
+
+class FrotaHorarios:
+    def __init__(self, minuto_inicio, duracao, mascara_dias, vazao=12.0, fuso=None, fusos=(), horarios=None):
+        self.minuto_inicio = np.asarray(minuto_inicio, dtype=np.int32)
+        self.duracao = np.asarray(duracao, dtype=np.int32)
+        self.mascara_dias = np.asarray(mascara_dias, dtype=bool).reshape(-1, 7)
+        # Vazão de cada zona em L/min (um valor para todas ou um por horário)
+        self.vazao = np.broadcast_to(np.asarray(vazao, dtype=np.float64), self.duracao.shape)
+        # Fuso de cada linha, como índice em `fusos` (nomes; None é o fuso padrão). Sem fusos, as
+        # linhas já estão em UTC
+        self.fusos = tuple(fusos)
+        self.fuso = np.zeros(self.duracao.shape, dtype=np.int32) if fuso is None else np.asarray(fuso, dtype=np.int32)
+        # Horários de origem; com o escalonamento, uma rega adiada pode virar mais de uma linha
+        self.horarios = len(self.duracao) if horarios is None else horarios
+
+    @classmethod
+    def das_linhas(cls, linhas, vazao=12.0, escalonar: bool = False):
+        """Monta a frota a partir das linhas de uma consulta, agrupadas por conta (ordenadas por `usuario_id`).
+
+        Cada linha traz o horário (`id`, `hora`, `duracao`, `dias_semana`, `vazao_l_min`) e a conta
+        (`usuario_id`, `max_zonas_simultaneas`, `vazao_maxima_l_min`, `fuso_horario`). Horários sem
+        vazão própria usam `vazao`. Com `escalonar`, as contas com restrição entram com os
+        intervalos efetivos do escalonamento (as regas adiadas) em vez dos pedidos.
+        """
+        minutos, duracoes, dias, vazoes, fusos_linhas = [], [], [], [], []
+        fusos = {}
+        horarios = 0
+        for _, linhas_conta in itertools.groupby(linhas, key=lambda linha: linha.usuario_id):
+            linhas_conta = list(linhas_conta)
+            conta = linhas_conta[0]
+            fuso = fusos.setdefault(conta.fuso_horario, len(fusos))
+            horarios += len(linhas_conta)
+            restricao = escalonamento.Restricao(conta.max_zonas_simultaneas, conta.vazao_maxima_l_min)
+            if escalonar and restricao.ativa:
+                for rega in escalonamento.linha_do_tempo(linhas_conta, restricao, vazao):
+                    for inicio, fim in escalonamento.intervalos([rega]):
+                        # Uma rega adiada pode passar da meia-noite: vira uma linha por dia
+                        inicio, fim = inicio // 60, fim // 60
+                        while inicio < fim:
+                            dia = inicio // MINUTOS_DIA
+                            corte = min(fim, (dia + 1) * MINUTOS_DIA)
+                            minutos.append(inicio - dia * MINUTOS_DIA)
+                            duracoes.append(corte - inicio)
+                            dias.append(NOMES_DIAS[dia])
+                            vazoes.append(rega.vazao)
+                            fusos_linhas.append(fuso)
+                            inicio = corte
+                continue
+            for linha in linhas_conta:
+                minutos.append(linha.hora.hour * 60 + linha.hora.minute)
+                duracoes.append(linha.duracao)
+                dias.append(linha.dias_semana)
+                vazoes.append(linha.vazao_l_min or vazao)
+                fusos_linhas.append(fuso)
+        mascara = mascaras_dias(dias) if dias else np.zeros((0, 7), dtype=bool)
+        return cls(minutos, duracoes, mascara, vazoes, fusos_linhas, fusos, horarios)
+
+    @classmethod
+    def sintetica(cls, quantidade: int, vazao=12.0, semente: int = 0):
+        """Frota aleatória (horários em múltiplos de 5 min, 5 a 60 min de rega), para benchmark."""
+        rng = np.random.default_rng(semente)
+        minutos = rng.integers(0, MINUTOS_DIA // 5, quantidade) * 5
+        duracoes = rng.integers(1, 13, quantidade) * 5
+        mascara = rng.random((quantidade, 7)) < 0.4
+        return cls(minutos, duracoes, mascara, vazao)
+
+    def __len__(self):
+        return len(self.duracao)
+
+    def deslocamentos(self, deslocamento_do_fuso, instante: datetime) -> np.ndarray:
+        """Minutos da hora local até UTC de cada linha no `instante`; `deslocamento_do_fuso(nome, instante)`."""
+        if not self.fusos:
+            return np.zeros(self.duracao.shape, dtype=np.int32)
+        por_fuso = np.array([deslocamento_do_fuso(nome, instante) for nome in self.fusos], dtype=np.int32)
+        return por_fuso[self.fuso]
+
+    def intervalos(self, deslocamento=None):
+        """(inicios, fins, indice_do_horario) em minutos da semana, um por dia marcado de cada horário.
+
+        Com `deslocamento` (minutos por linha, hora local menos UTC), os intervalos saem em UTC;
+        os que passam do fim da semana continuam na segunda-feira.
+        """
+        linhas, dias = np.nonzero(self.mascara_dias)
+        inicios = dias * MINUTOS_DIA + self.minuto_inicio[linhas]
+        fins = np.minimum(inicios + self.duracao[linhas], (dias + 1) * MINUTOS_DIA)
+        validos = fins > inicios
+        inicios, fins, linhas = inicios[validos], fins[validos], linhas[validos]
+        if deslocamento is None or not np.any(deslocamento):
+            return inicios, fins, linhas
+        duracoes = fins - inicios
+        inicios = (inicios - deslocamento[linhas]) % MINUTOS_SEMANA
+        fins = inicios + duracoes
+        passa = fins > MINUTOS_SEMANA
+        return (np.concatenate([inicios, np.zeros(np.count_nonzero(passa), dtype=inicios.dtype)]),
+                np.concatenate([np.minimum(fins, MINUTOS_SEMANA), fins[passa] - MINUTOS_SEMANA]),
+                np.concatenate([linhas, linhas[passa]]))
+
+    def curvas_semana(self, deslocamento=None):
+        """Zonas regando e demanda (L/min) em cada um dos 10080 minutos da semana."""
+        inicios, fins, linhas = self.intervalos(deslocamento)
+        tamanho = MINUTOS_SEMANA + 1
+        zonas = np.cumsum(np.bincount(inicios, minlength=tamanho) - np.bincount(fins, minlength=tamanho))
+        vazao = self.vazao[linhas]
+        demanda = np.cumsum(np.bincount(inicios, weights=vazao, minlength=tamanho)
+                            - np.bincount(fins, weights=vazao, minlength=tamanho))
+        # A soma acumulada em ponto flutuante pode deixar resíduos como -1e-12 onde a demanda é zero
+        return zonas[:MINUTOS_SEMANA], np.where(zonas[:MINUTOS_SEMANA] > 0, demanda[:MINUTOS_SEMANA], 0.0)
+
+
+class CurvaDemanda:
+    """Curvas minuto a minuto de um período, começando em `inicio` (date) ou numa segunda-feira genérica."""
+
+    def __init__(self, zonas: np.ndarray, demanda: np.ndarray, inicio: date = None):
+        self.zonas = zonas
+        self.demanda = demanda
+        self.inicio = inicio
+
+    @classmethod
+    def semana(cls, frota: FrotaHorarios, deslocamento_do_fuso=None, agora: datetime = None):
+        """Semana genérica em UTC, com o deslocamento de cada fuso em `agora` (padrão: agora)."""
+        deslocamento = None
+        if deslocamento_do_fuso is not None:
+            deslocamento = frota.deslocamentos(deslocamento_do_fuso, agora or datetime.utcnow())
+        return cls(*frota.curvas_semana(deslocamento))
+
+    @classmethod
+    def periodo(cls, frota: FrotaHorarios, inicio: date, dias: int, deslocamento_do_fuso=None):
+        """`dias` dias (UTC) a partir de `inicio`; o deslocamento dos fusos é o do meio-dia de cada dia."""
+        total = dias * MINUTOS_DIA
+        if deslocamento_do_fuso is None or not frota.fusos:
+            zonas, demanda = frota.curvas_semana()
+            deslocamento = inicio.weekday() * MINUTOS_DIA
+            return cls(np.resize(np.roll(zonas, -deslocamento), total),
+                       np.resize(np.roll(demanda, -deslocamento), total), inicio)
+
+        # Uma curva semanal por combinação de deslocamentos (poucas: horário de verão ou não)
+        curvas = {}
+        zonas = np.empty(total, dtype=np.int64)
+        demanda = np.empty(total, dtype=np.float64)
+        for numero in range(dias):
+            dia = inicio + timedelta(days=numero)
+            deslocamento = frota.deslocamentos(deslocamento_do_fuso, datetime.combine(dia, time(12)))
+            chave = deslocamento.tobytes()
+            if chave not in curvas:
+                curvas[chave] = frota.curvas_semana(deslocamento)
+            zonas_semana, demanda_semana = curvas[chave]
+            origem = slice(dia.weekday() * MINUTOS_DIA, (dia.weekday() + 1) * MINUTOS_DIA)
+            destino = slice(numero * MINUTOS_DIA, (numero + 1) * MINUTOS_DIA)
+            zonas[destino] = zonas_semana[origem]
+            demanda[destino] = demanda_semana[origem]
+        return cls(zonas, demanda, inicio)
+
+    def rotulo(self, minuto: int) -> str:
+        dia, resto = divmod(int(minuto), MINUTOS_DIA)
+        hora = f'{resto // 60:02d}:{resto % 60:02d}'
+        if self.inicio is None:
+            return f'{NOMES_DIAS[dia % 7]} {hora}'
+        return f'{(self.inicio + timedelta(days=dia)).isoformat()} {hora}'
+
+    def agregada(self, resolucao: int = 1):
+        """Por bloco de `resolucao` minutos: máximo de zonas, máximo de demanda e volume (L)."""
+        if resolucao <= 0 or MINUTOS_DIA % resolucao:
+            raise ValueError('A resolução precisa ser positiva e dividir 1440 minutos.')
+        zonas = self.zonas.reshape(-1, resolucao)
+        demanda = self.demanda.reshape(-1, resolucao)
+        return zonas.max(axis=1), demanda.max(axis=1), demanda.sum(axis=1)
+
+    def resumo(self, frota: FrotaHorarios = None) -> dict:
+        pico_zonas = int(self.zonas.max()) if len(self.zonas) else 0
+        pico_demanda = float(self.demanda.max()) if len(self.demanda) else 0.0
+        volume_por_dia = self.demanda.reshape(-1, MINUTOS_DIA).sum(axis=1)
+        dados = {
+            'minutos': len(self.zonas),
+            'pico_zonas': pico_zonas,
+            'pico_zonas_em': self.rotulo(np.argmax(self.zonas)),
+            'minutos_no_pico': int(np.count_nonzero(self.zonas == pico_zonas)) if pico_zonas else 0,
+            'pico_demanda_l_min': round(pico_demanda, 3),
+            'pico_demanda_em': self.rotulo(np.argmax(self.demanda)),
+            'demanda_media_l_min': round(float(self.demanda.mean()), 3),
+            'demanda_p95_l_min': round(float(np.percentile(self.demanda, 95)), 3),
+            'minutos_com_rega': int(np.count_nonzero(self.zonas)),
+            'volume_total_l': round(float(volume_por_dia.sum()), 3),
+            'volume_dia_max_l': round(float(volume_por_dia.max()), 3),
+            'volume_por_dia_l': [round(float(v), 3) for v in volume_por_dia],
+        }
+        if frota is not None:
+            intervalos = int(np.count_nonzero(frota.mascara_dias[frota.duracao > 0]))
+            dados = {'horarios': frota.horarios, 'intervalos_semana': intervalos, **dados}
+        return dados
+
+    def exportar_csv(self, resolucao: int = 1):
+        """Gera o CSV da curva em pedaços: uma linha por bloco de `resolucao` minutos."""
+        zonas, demanda, volume = self.agregada(resolucao)
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer, delimiter=';')
+        escritor.writerow(['inicio', 'zonas_max', 'demanda_max_l_min', 'volume_l'])
+        for numero in range(len(zonas)):
+            escritor.writerow([self.rotulo(numero * resolucao), int(zonas[numero]),
+                               round(float(demanda[numero]), 3), round(float(volume[numero]), 3)])
+            if numero % 500 == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
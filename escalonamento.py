@@ -0,0 +1,142 @@
+"""Escalonamento automático das zonas de uma conta.
+
+Vários horários com a mesma hora numa linha de água compartilhada abrem todas
+as válvulas juntas e a pressão cai. Com uma restrição na conta (máximo de
+zonas simultâneas e/ou vazão máxima em L/min), cada rega da semana é adiada o
+mínimo necessário para caber na capacidade, na ordem do horário pedido.
+
+O algoritmo é uma varredura ordenada: as regas são percorridas por início
+pedido, as que estão em andamento ficam num heap por fim e, quando a próxima
+não cabe, o instante avança para o fim da rega que termina primeiro. Custa
+O(n log n) para n regas na semana. A semana é simulada duas vezes para que
+atrasos do domingo à noite passem corretamente para a segunda-feira.
+
+Sem restrição (ou sem conflitos), os intervalos são os mesmos de
+`agenda.intervalos_semana`, inclusive o corte da duração à meia-noite.
+"""
+import heapq
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+from agenda import DIAS_SEMANA, SEGUNDOS_DIA, SEGUNDOS_SEMANA
+
+NOMES_DIAS = sorted(DIAS_SEMANA, key=DIAS_SEMANA.get)
+
+
+class Restricao(NamedTuple):
+    max_zonas: Optional[int] = None
+    vazao_maxima: Optional[float] = None
+
+    @property
+    def ativa(self) -> bool:
+        return bool(self.max_zonas) or bool(self.vazao_maxima)
+
+
+class Rega(NamedTuple):
+    horario_id: int
+    inicio_pedido: int  # segundos da semana
+    inicio: int         # início efetivo; pode passar do fim da semana (continua na seguinte)
+    fim: int
+    vazao: float
+
+    @property
+    def atraso(self) -> int:
+        return self.inicio - self.inicio_pedido
+
+    @property
+    def dia(self) -> str:
+        return NOMES_DIAS[(self.inicio // SEGUNDOS_DIA) % 7]
+
+
+def rotulo(segundos: int) -> str:
+    """Segundos da semana -> 'Seg 06:15'."""
+    dia, resto = divmod(int(segundos) % SEGUNDOS_SEMANA, SEGUNDOS_DIA)
+    return f'{NOMES_DIAS[dia]} {resto // 3600:02d}:{resto % 3600 // 60:02d}'
+
+
+def regas_pedidas(horarios, vazao_padrao: float):
+    """Uma rega por dia marcado de cada horário, com a duração cortada à meia-noite como em `agenda`."""
+    for horario in horarios:
+        inicio_dia = horario.hora.hour * 3600 + horario.hora.minute * 60 + horario.hora.second
+        vazao = getattr(horario, 'vazao_l_min', None) or vazao_padrao
+        for dia in horario.dias_semana.split(','):
+            indice = DIAS_SEMANA.get(dia.strip())
+            if indice is None:
+                continue
+            inicio = indice * SEGUNDOS_DIA + inicio_dia
+            fim = min(inicio + horario.duracao * 60, (indice + 1) * SEGUNDOS_DIA)
+            if fim > inicio:
+                yield Rega(horario.id, inicio, inicio, fim, vazao)
+
+
+def escalonar(regas, restricao: Restricao):
+    """Regas com o início efetivo que respeita `restricao`, ordenadas pelo início pedido."""
+    pedidas = sorted(regas, key=lambda rega: (rega.inicio_pedido, rega.horario_id))
+    if not restricao.ativa or not pedidas:
+        return pedidas
+    max_zonas = restricao.max_zonas or len(pedidas)
+    vazao_maxima = restricao.vazao_maxima or float('inf')
+
+    resultado = []
+    em_andamento = []  # heap (fim, vazao)
+    vazao_total = 0.0
+    instante = None
+    for semana in (0, 1):
+        deslocamento = semana * SEGUNDOS_SEMANA
+        for rega in pedidas:
+            inicio = rega.inicio_pedido + deslocamento
+            instante = inicio if instante is None else max(instante, inicio)
+            while em_andamento and em_andamento[0][0] <= instante:
+                vazao_total -= heapq.heappop(em_andamento)[1]
+            # Uma rega que sozinha passa da vazão máxima roda quando a linha estiver livre
+            while em_andamento and (len(em_andamento) >= max_zonas or vazao_total + rega.vazao > vazao_maxima):
+                fim, vazao = heapq.heappop(em_andamento)
+                vazao_total -= vazao
+                instante = max(instante, fim)
+            duracao = rega.fim - rega.inicio_pedido
+            heapq.heappush(em_andamento, (instante + duracao, rega.vazao))
+            vazao_total += rega.vazao
+            if semana == 1:
+                # A segunda passada já considera o que sobrou da semana anterior
+                inicio_efetivo = instante - SEGUNDOS_SEMANA
+                resultado.append(rega._replace(inicio=inicio_efetivo, fim=inicio_efetivo + duracao))
+    return resultado
+
+
+def intervalos(regas):
+    """(inicio, fim) em segundos da semana; regas que passam do domingo são divididas em duas."""
+    for rega in regas:
+        inicio = rega.inicio % SEGUNDOS_SEMANA
+        fim = inicio + (rega.fim - rega.inicio)
+        if fim <= SEGUNDOS_SEMANA:
+            yield inicio, fim
+        else:
+            yield inicio, SEGUNDOS_SEMANA
+            yield 0, fim - SEGUNDOS_SEMANA
+
+
+def pico(regas):
+    """(zonas, vazão) máximas simultâneas, por varredura dos inícios e fins."""
+    eventos = sorted([(rega.inicio, 1, rega.vazao) for rega in regas]
+                     + [(rega.fim, -1, -rega.vazao) for rega in regas])
+    zonas = vazao = maximo_zonas = maximo_vazao = 0
+    for _, delta, delta_vazao in eventos:  # fins vêm antes de inícios no mesmo instante
+        zonas += delta
+        vazao += delta_vazao
+        maximo_zonas = max(maximo_zonas, zonas)
+        maximo_vazao = max(maximo_vazao, vazao)
+    return maximo_zonas, maximo_vazao
+
+
+def linha_do_tempo(horarios, restricao: Restricao, vazao_padrao: float):
+    return escalonar(regas_pedidas(horarios, vazao_padrao), restricao)
+
+
+@lru_cache(maxsize=4096)
+def _intervalos_efetivos(horarios: tuple, restricao: Restricao, vazao_padrao: float):
+    return tuple(intervalos(linha_do_tempo(horarios, restricao, vazao_padrao)))
+
+
+def intervalos_efetivos(horarios, restricao: Restricao, vazao_padrao: float):
+    """Intervalos efetivos da semana, em cache pelo conteúdo dos horários (linhas hasheáveis, como `Row`)."""
+    return _intervalos_efetivos(tuple(horarios), restricao, vazao_padrao)
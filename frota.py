@@ -0,0 +1,232 @@
+"""Visão geral da frota para administradores.
+
+Dois pedaços, para que a página não percorra `Usuario.horarios` conta a conta:
+
+- `RegistroContatos`: o endpoint da ESP32 anota em memória o último contato
+  de cada dispositivo (e a última vez em que ele recebeu "regar"); uma thread
+  por processo grava o acumulado em lote a cada `intervalo` segundos, numa
+  transação própria e sempre crescente (um worker atrasado não volta o
+  horário para trás). A consulta quente não ganha nenhuma escrita.
+- `atualizar_resumo`: recalcula a tabela de resumo (uma linha por conta, com
+  horários ativos, horários de hoje, último contato e anomalias) a partir de
+  uma única consulta ordenada. Roda periodicamente pela fila de tarefas; a
+  página do administrador só lê o resumo, paginado pela chave primária ou
+  pelo índice (anomalia, usuario_id).
+
+Horários de hoje e rega prevista são avaliados na hora local de cada conta
+(`fusos.CacheFusos`); os instantes gravados continuam em UTC.
+
+Anomalias, da mais grave para a menos grave:
+
+- `sem_dispositivo`: há horários ativos, mas a conta não tem chave de API;
+- `sem_contato`: a ESP32 nunca consultou ou está calada há mais de
+  `limite_sem_contato` segundos;
+- `rega_nao_executada`: a última rega prevista (iniciada há pelo menos
+  `tolerancia` segundos) não foi entregue ao dispositivo.
+"""
+import atexit
+import itertools
+import os
+import threading
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+
+import agenda
+import escalonamento
+
+SEM_DISPOSITIVO = 'sem_dispositivo'
+SEM_CONTATO = 'sem_contato'
+REGA_NAO_EXECUTADA = 'rega_nao_executada'
+ANOMALIAS = (SEM_DISPOSITIVO, SEM_CONTATO, REGA_NAO_EXECUTADA)
+
+
+class RegistroContatos:
+    def __init__(self, app=None, db=None, modelo=None, intervalo: float = 30.0):
+        self.modelo = modelo
+        self.intervalo = intervalo
+        self._pendentes = {}    # usuario_id -> [visto_em, regou_em]
+        self._lock = threading.Lock()
+        self._pid = None
+        self._parar = threading.Event()
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        self.logger = app.logger
+        with app.app_context():
+            self.engine = db.engine
+        app.extensions['frota_contatos'] = self
+
+    def registrar(self, usuario_id: int, instante: datetime, regando: bool):
+        with self._lock:
+            item = self._pendentes.get(usuario_id)
+            if item is None:
+                self._pendentes[usuario_id] = [instante, instante if regando else None]
+            else:
+                item[0] = instante
+                if regando:
+                    item[1] = instante
+        self._garantir_gravador()
+
+    def _garantir_gravador(self):
+        # Uma thread por processo; depois de um fork (workers do gunicorn) ela precisa ser recriada
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._rodar, name='frota-contatos', daemon=True).start()
+            atexit.register(self.gravar)
+
+    def _rodar(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.gravar()
+            except Exception:
+                self.logger.warning('Falha ao gravar os contatos dos dispositivos.', exc_info=True)
+
+    def gravar(self):
+        """Grava os contatos acumulados; em caso de erro eles voltam para a próxima rodada."""
+        with self._lock:
+            pendentes, self._pendentes = self._pendentes, {}
+        if not pendentes:
+            return 0
+        tabela = self.modelo.__table__
+        try:
+            with self.engine.begin() as conexao:
+                # Cria as linhas que faltam sem ler antes: dois processos gravando o mesmo dispositivo
+                # não colidem na chave primária; os UPDATEs abaixo só avançam os instantes
+                conexao.execute(_inserir_ignorando(conexao, tabela, 'usuario_id'),
+                                [{'usuario_id': usuario_id, 'visto_em': visto, 'regou_em': regou}
+                                 for usuario_id, (visto, regou) in pendentes.items()])
+                conexao.execute(
+                    sa.update(tabela)
+                    .where(tabela.c.usuario_id == sa.bindparam('b_id'),
+                           sa.or_(tabela.c.visto_em.is_(None), tabela.c.visto_em < sa.bindparam('b_instante')))
+                    .values(visto_em=sa.bindparam('b_instante')),
+                    [{'b_id': usuario_id, 'b_instante': visto} for usuario_id, (visto, _) in pendentes.items()])
+                regas = [{'b_id': usuario_id, 'b_instante': regou}
+                         for usuario_id, (_, regou) in pendentes.items() if regou]
+                if regas:
+                    conexao.execute(
+                        sa.update(tabela)
+                        .where(tabela.c.usuario_id == sa.bindparam('b_id'),
+                               sa.or_(tabela.c.regou_em.is_(None), tabela.c.regou_em < sa.bindparam('b_instante')))
+                        .values(regou_em=sa.bindparam('b_instante')), regas)
+        except Exception:
+            with self._lock:
+                for usuario_id, (visto, regou) in pendentes.items():
+                    item = self._pendentes.setdefault(usuario_id, [visto, regou])
+                    item[0] = max(item[0], visto)
+                    if regou and (item[1] is None or item[1] < regou):
+                        item[1] = regou
+            raise
+        return len(pendentes)
+
+    def parar(self):
+        self._parar.set()
+
+
+def _inserir_ignorando(conexao, tabela, chave: str):
+    """INSERT que ignora as linhas cuja `chave` já existe (ON CONFLICT DO NOTHING)."""
+    if conexao.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif conexao.dialect.name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f'Banco sem suporte a ON CONFLICT: {conexao.dialect.name}')
+    return insert(tabela).on_conflict_do_nothing(index_elements=[tabela.c[chave]])
+
+
+def _ultima_rega_prevista(intervalos, agora: datetime, tolerancia: float, deslocamento=timedelta(0)):
+    """Início (UTC) da rega mais recente que começou há pelo menos `tolerancia` segundos (últimos 7 dias)."""
+    agora_s = agenda.segundos_da_semana(agora + deslocamento)
+    decorrido = None
+    for inicio, _ in intervalos:
+        delta = (agora_s - inicio - tolerancia) % agenda.SEGUNDOS_SEMANA + tolerancia
+        if decorrido is None or delta < decorrido:
+            decorrido = delta
+    if decorrido is None:
+        return None
+    return (agora - timedelta(seconds=decorrido)).replace(microsecond=0)
+
+
+def resumir_conta(conta, horarios, agora: datetime, vazao_padrao: float,
+                  limite_sem_contato: float, tolerancia: float, deslocamento=timedelta(0)) -> dict:
+    """Linha do resumo de uma conta; `conta` traz as colunas de usuário e contato da consulta de `atualizar_resumo`."""
+    hoje = (agora + deslocamento).weekday()
+    horarios_hoje = sum(
+        1 for h in horarios
+        if any(agenda.DIAS_SEMANA.get(dia.strip()) == hoje for dia in h.dias_semana.split(','))
+    )
+    restricao = escalonamento.Restricao(conta.max_zonas_simultaneas, conta.vazao_maxima_l_min)
+    if restricao.ativa:
+        # Sem o cache de `intervalos_efetivos`: estas linhas não se repetem e só o encheriam
+        intervalos = list(escalonamento.intervalos(escalonamento.linha_do_tempo(horarios, restricao, vazao_padrao)))
+    else:
+        intervalos = list(agenda.intervalos_semana(horarios))
+    rega_prevista_em = _ultima_rega_prevista(intervalos, agora, tolerancia, deslocamento)
+
+    anomalia = None
+    if horarios and not conta.tem_chave:
+        anomalia = SEM_DISPOSITIVO
+    elif conta.tem_chave and (conta.visto_em is None
+                              or conta.visto_em < agora - timedelta(seconds=limite_sem_contato)):
+        anomalia = SEM_CONTATO
+    elif rega_prevista_em is not None and (conta.regou_em is None or conta.regou_em < rega_prevista_em):
+        anomalia = REGA_NAO_EXECUTADA
+
+    return {
+        'usuario_id': conta.usuario_id,
+        'nome': conta.nome,
+        'email': conta.email,
+        'tem_chave': conta.tem_chave,
+        'horarios_ativos': len(horarios),
+        'horarios_hoje': horarios_hoje,
+        'visto_em': conta.visto_em,
+        'regou_em': conta.regou_em,
+        'rega_prevista_em': rega_prevista_em,
+        'anomalia': anomalia,
+        'atualizado_em': agora,
+    }
+
+
+def atualizar_resumo(db, usuario, horario, contato, resumo, agora: datetime = None, fusos=None,
+                     vazao_padrao: float = 12.0, limite_sem_contato: float = 600.0,
+                     tolerancia: float = 300.0, lote: int = 1000) -> int:
+    """Recalcula a tabela de resumo inteira e retorna o número de contas.
+
+    A leitura é uma só consulta ordenada por conta (usuário LEFT JOIN contato
+    LEFT JOIN horários ativos), lida em streaming numa transação de leitura; a
+    troca do conteúdo é uma transação curta, então a página continua lendo o
+    resumo anterior até o commit.
+    """
+    agora = agora or datetime.utcnow()
+    u, h, c = usuario.__table__, horario.__table__, contato.__table__
+    consulta = (
+        sa.select(u.c.id.label('usuario_id'), u.c.nome, u.c.email,
+                  (u.c.esp32_api_key.is_not(None)).label('tem_chave'),
+                  u.c.max_zonas_simultaneas, u.c.vazao_maxima_l_min, u.c.fuso_horario,
+                  c.c.visto_em, c.c.regou_em,
+                  h.c.id, h.c.hora, h.c.duracao, h.c.dias_semana, h.c.vazao_l_min)
+        .select_from(u.outerjoin(c, c.c.usuario_id == u.c.id)
+                     .outerjoin(h, sa.and_(h.c.usuario_id == u.c.id, h.c.ativo == True)))
+        .order_by(u.c.id, h.c.id)
+    )
+    linhas_resumo = []
+    with db.engine.connect().execution_options(yield_per=5000) as conexao:
+        for _, linhas in itertools.groupby(conexao.execute(consulta), key=lambda linha: linha.usuario_id):
+            linhas = list(linhas)
+            horarios = tuple(linha for linha in linhas if linha.id is not None)
+            deslocamento = fusos.deslocamento(linhas[0].fuso_horario, agora)[0] if fusos else timedelta(0)
+            linhas_resumo.append(resumir_conta(linhas[0], horarios, agora, vazao_padrao,
+                                               limite_sem_contato, tolerancia, deslocamento))
+
+    tabela = resumo.__table__
+    with db.engine.begin() as conexao:
+        conexao.execute(sa.delete(tabela))
+        for inicio in range(0, len(linhas_resumo), lote):
+            conexao.execute(sa.insert(tabela), linhas_resumo[inicio:inicio + lote])
+    return len(linhas_resumo)
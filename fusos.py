@@ -0,0 +1,105 @@
+"""Fusos horários das contas, com o deslocamento UTC em cache.
+
+Os horários de rega são cadastrados na hora local da conta. Converter cada
+consulta da ESP32 com `astimezone` custa uma busca nas regras do fuso; aqui,
+por fuso, ficam em cache o deslocamento atual e o intervalo UTC em que ele
+vale (da última à próxima mudança de horário de verão). Enquanto o instante
+estiver nesse intervalo, a hora local é só `agora_utc + deslocamento`; o
+cache do fuso é recalculado apenas quando uma mudança é cruzada.
+
+Os intervalos semanais de `agenda` ficam na hora local (de parede), então não
+dependem do deslocamento e não precisam ser refeitos na mudança de horário.
+"""
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError, available_timezones
+
+SEGUNDOS_DIA = 24 * 60 * 60
+
+
+def zona_valida(nome: str) -> bool:
+    try:
+        ZoneInfo(nome)
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
+    return True
+
+
+@lru_cache(maxsize=None)
+def zonas_disponiveis() -> tuple:
+    # Varre a base tzdata do disco (dezenas de ms); a lista não muda com o processo rodando
+    return tuple(sorted(available_timezones()))
+
+
+def _deslocamento(zona, instante: int) -> int:
+    """Deslocamento UTC da zona, em segundos, no instante (segundos desde a época)."""
+    return int(datetime.fromtimestamp(instante, timezone.utc).astimezone(zona).utcoffset().total_seconds())
+
+
+def _mudanca(zona, instante: int, deslocamento: int, passo: int, horizonte: int):
+    """Instante da mudança de deslocamento mais próxima na direção de `passo` (None se não houver).
+
+    Anda de `passo` em `passo` segundos até achar outro deslocamento (ou passar
+    do horizonte) e então faz uma busca binária até o segundo exato. O
+    instante devolvido é o primeiro segundo do regime posterior à mudança.
+    """
+    igual = instante
+    for _ in range(horizonte):
+        diferente = igual + passo
+        if _deslocamento(zona, diferente) != deslocamento:
+            break
+        igual = diferente
+    else:
+        return None
+    while abs(diferente - igual) > 1:
+        meio = (igual + diferente) // 2
+        if _deslocamento(zona, meio) == deslocamento:
+            igual = meio
+        else:
+            diferente = meio
+    return max(igual, diferente)
+
+
+def _utc_ingenuo(instante: int) -> datetime:
+    return datetime.fromtimestamp(instante, timezone.utc).replace(tzinfo=None)
+
+
+class CacheFusos:
+    """(deslocamento, início, fim) por fuso; os instantes são UTC ingênuos, como `datetime.utcnow()`."""
+
+    def __init__(self, padrao: str = 'UTC', horizonte_dias: int = 400):
+        self.padrao = padrao if zona_valida(padrao) else 'UTC'
+        self.horizonte_dias = horizonte_dias
+        self._fusos = {}
+
+    def deslocamento(self, nome, agora: datetime):
+        """(timedelta até a hora local, instante UTC da próxima mudança de deslocamento)."""
+        nome = nome or self.padrao
+        item = self._fusos.get(nome)
+        if item is None or not item[1] <= agora < item[2]:
+            item = self._calcular(nome, agora)
+            # Troca a tupla inteira de uma vez; leitores em outras threads veem a antiga ou a nova
+            self._fusos[nome] = item
+        return item[0], item[2]
+
+    def hora_local(self, nome, agora: datetime) -> datetime:
+        return agora + self.deslocamento(nome, agora)[0]
+
+    def _calcular(self, nome, agora: datetime):
+        try:
+            zona = ZoneInfo(nome)
+        except (ZoneInfoNotFoundError, ValueError):
+            zona = ZoneInfo(self.padrao)
+        instante = int(agora.replace(tzinfo=timezone.utc).timestamp())
+        deslocamento = _deslocamento(zona, instante)
+        # Sem mudança dentro do horizonte (fusos sem horário de verão), o item vale até o horizonte
+        inicio = _mudanca(zona, instante, deslocamento, -SEGUNDOS_DIA, self.horizonte_dias)
+        fim = _mudanca(zona, instante, deslocamento, SEGUNDOS_DIA, self.horizonte_dias)
+        if inicio is None:
+            inicio = instante - self.horizonte_dias * SEGUNDOS_DIA
+        if fim is None:
+            fim = instante + self.horizonte_dias * SEGUNDOS_DIA
+        return timedelta(seconds=deslocamento), _utc_ingenuo(inicio), _utc_ingenuo(fim)
+
+    def limpar(self):
+        self._fusos.clear()
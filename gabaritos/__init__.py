@@ -0,0 +1,9 @@
+"""Leitura de gabaritos (folhas de respostas de múltipla escolha)."""
+from .leitura import EM_BRANCO, MULTIPLA, ErroLeitura, ResultadoLeitura, carregar_imagem, ler_folha
+from .modelo import ModeloGabarito, validar_parametros
+from .resultados import ResultadosProva
+
+__all__ = [
+    'EM_BRANCO', 'MULTIPLA', 'ErroLeitura', 'ModeloGabarito', 'ResultadoLeitura', 'ResultadosProva',
+    'carregar_imagem', 'ler_folha', 'validar_parametros',
+]
@@ -0,0 +1,133 @@
+"""Armazenamento endereçado por conteúdo das páginas digitalizadas.
+
+Cada página é gravada uma única vez em objetos/<2 primeiros>/<sha256>, então
+reenviar as mesmas folhas não ocupa disco de novo. Miniaturas e prévias são
+geradas na primeira requisição em cache/<rendição>/ e removidas por ordem de
+último acesso (mtime) quando o cache passa do limite.
+
+O diretório de cache é compartilhado por todos os processos (workers web e de
+tarefas), e cada um só sabe quanto ele mesmo gravou. O total em memória serve
+apenas para decidir quando olhar o disco: a cada `FRACAO_RECONTAGEM` do limite
+gravada pelo processo (ou quando a estimativa passa do limite) o tamanho é
+recontado no disco, e a remoção é decidida sobre esse total real.
+"""
+import hashlib
+import os
+import re
+import tempfile
+import threading
+
+TAMANHO_BLOCO = 1024 * 1024
+RENDICOES = {'miniatura': 200, 'previa': 1000}
+FRACAO_RECONTAGEM = 0.05
+_HASH_VALIDO = re.compile(r'^[0-9a-f]{64}$')
+
+
+class ArmazemBlobs:
+    def __init__(self, raiz: str, limite_cache_bytes: int = 512 * 1024 * 1024):
+        self.raiz = raiz
+        self.dir_objetos = os.path.join(raiz, 'objetos')
+        self.dir_cache = os.path.join(raiz, 'cache')
+        self.limite_cache = limite_cache_bytes
+        self._tamanho_cache = None   # total no disco na última recontagem
+        self._gravado_desde = 0      # bytes gravados por este processo desde então
+        self._lock = threading.Lock()
+
+    def caminho(self, hash_hex: str) -> str:
+        if not _HASH_VALIDO.match(hash_hex):
+            raise ValueError('Hash inválido.')
+        return os.path.join(self.dir_objetos, hash_hex[:2], hash_hex)
+
+    def existe(self, hash_hex: str) -> bool:
+        return os.path.exists(self.caminho(hash_hex))
+
+    def guardar_stream(self, origem) -> str:
+        """Grava o conteúdo de `origem` (lido em blocos) e retorna seu sha256.
+
+        Conteúdo repetido é descartado: o arquivo temporário só é promovido se o objeto não existir.
+        """
+        os.makedirs(self.dir_objetos, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, temporario = tempfile.mkstemp(dir=self.dir_objetos, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as saida:
+                while True:
+                    bloco = origem.read(TAMANHO_BLOCO)
+                    if not bloco:
+                        break
+                    digest.update(bloco)
+                    saida.write(bloco)
+            hash_hex = digest.hexdigest()
+            destino = self.caminho(hash_hex)
+            if os.path.exists(destino):
+                os.unlink(temporario)
+            else:
+                os.makedirs(os.path.dirname(destino), exist_ok=True)
+                os.replace(temporario, destino)
+            return hash_hex
+        except BaseException:
+            if os.path.exists(temporario):
+                os.unlink(temporario)
+            raise
+
+    def rendicao(self, hash_hex: str, nome: str) -> str:
+        """Caminho de uma rendição JPEG do objeto, gerada na primeira vez que é pedida."""
+        lado = RENDICOES[nome]
+        destino = os.path.join(self.dir_cache, nome, hash_hex[:2], f'{hash_hex}.jpg')
+        try:
+            os.utime(destino)  # marca o acesso para a remoção por LRU
+            return destino
+        except FileNotFoundError:
+            pass
+
+        from PIL import Image
+
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        with Image.open(self.caminho(hash_hex)) as imagem:
+            imagem = imagem.convert('L')
+            imagem.thumbnail((lado, lado))
+            fd, temporario = tempfile.mkstemp(dir=os.path.dirname(destino), prefix='.tmp-')
+            with os.fdopen(fd, 'wb') as saida:
+                imagem.save(saida, 'JPEG', quality=80)
+        os.replace(temporario, destino)
+        self._registrar_no_cache(os.path.getsize(destino))
+        return destino
+
+    def _registrar_no_cache(self, tamanho: int):
+        with self._lock:
+            self._gravado_desde += tamanho
+            if (self._tamanho_cache is not None
+                    and self._gravado_desde < self.limite_cache * FRACAO_RECONTAGEM
+                    and self._tamanho_cache + self._gravado_desde <= self.limite_cache):
+                return
+            # Outros processos também gravam no cache: a estimativa local não basta para remover
+            self._tamanho_cache = self._remover_antigos(self.limite_cache, int(self.limite_cache * 0.9))
+            self._gravado_desde = 0
+
+    def _arquivos_cache(self):
+        for diretorio, _, arquivos in os.walk(self.dir_cache):
+            for nome in arquivos:
+                if nome.startswith('.tmp-'):
+                    continue
+                caminho = os.path.join(diretorio, nome)
+                try:
+                    yield caminho, os.stat(caminho)
+                except FileNotFoundError:
+                    pass
+
+    def _remover_antigos(self, limite: int, alvo: int) -> int:
+        """Reconta o cache no disco; se passar de `limite`, remove os menos acessados até `alvo`. Retorna o total."""
+        arquivos = list(self._arquivos_cache())
+        total = sum(info.st_size for _, info in arquivos)
+        if total <= limite:
+            return total
+        arquivos.sort(key=lambda item: item[1].st_mtime)
+        for caminho, info in arquivos:
+            if total <= alvo:
+                break
+            try:
+                os.unlink(caminho)
+                total -= info.st_size
+            except FileNotFoundError:
+                pass
+        return total
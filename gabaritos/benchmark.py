@@ -0,0 +1,36 @@
+"""Benchmark do leitor com folhas sintéticas.
+
+Uso: python -m gabaritos.benchmark [quantidade]
+"""
+import sys
+import time
+
+import numpy as np
+
+from .leitura import ler_folha
+from .modelo import ModeloGabarito
+from .sintetico import gerar_folha, respostas_aleatorias
+
+
+def executar(quantidade: int = 200, semente: int = 0):
+    modelo = ModeloGabarito()
+    rng = np.random.default_rng(semente)
+    gabaritos = [respostas_aleatorias(modelo, rng, fracao_branco=0.05) for _ in range(16)]
+    folhas = [
+        gerar_folha(modelo, g, angulo=rng.uniform(-2, 2), deslocamento=rng.uniform(-8, 8, 2), ruido=12, rng=rng)
+        for g in gabaritos
+    ]
+
+    acertos = 0
+    inicio = time.perf_counter()
+    for i in range(quantidade):
+        resultado = ler_folha(folhas[i % len(folhas)], modelo)
+        acertos += int(np.array_equal(resultado.respostas, gabaritos[i % len(folhas)]))
+    decorrido = time.perf_counter() - inicio
+
+    print(f"{quantidade} folhas de {folhas[0].shape[1]}x{folhas[0].shape[0]} px em {decorrido:.3f}s "
+          f"({quantidade / decorrido:.0f} folhas/s), {acertos}/{quantidade} lidas corretamente")
+
+
+if __name__ == '__main__':
+    executar(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
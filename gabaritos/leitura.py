@@ -0,0 +1,123 @@
+"""Motor de leitura óptica (OMR) vetorizado.
+
+Uma folha é processada inteira com operações de array do NumPy:
+binarização por Otsu (histograma amostrado), busca das marcas de registro com imagem
+integral, transformação afim do modelo para a imagem (corrige rotação, escala
+e deslocamento) e amostragem de todas as bolhas de uma vez por indexação.
+Não há laços por pixel em Python.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from .modelo import LARGURA, ModeloGabarito
+
+EM_BRANCO = -1
+MULTIPLA = -2
+
+
+class ErroLeitura(Exception):
+    pass
+
+
+@dataclass
+class ResultadoLeitura:
+    respostas: np.ndarray       # (questoes,) int8: índice da alternativa, EM_BRANCO ou MULTIPLA
+    preenchimento: np.ndarray   # (questoes, alternativas) float32 em [0, 1]
+    marcas: np.ndarray          # (4, 2) centros das marcas encontradas na imagem
+
+    def letras(self, modelo: ModeloGabarito):
+        codigos = {EM_BRANCO: '', MULTIPLA: '*'}
+        return [codigos.get(int(r), modelo.alternativas[r] if r >= 0 else '') for r in self.respostas]
+
+
+def limiar_otsu(cinza: np.ndarray, passo: int = 4) -> int:
+    # Uma amostra em grade (1/passo² dos pixels) basta para o histograma
+    hist = np.bincount(cinza[::passo, ::passo].ravel(), minlength=256).astype(np.float64)
+    peso = np.cumsum(hist)
+    soma = np.cumsum(hist * np.arange(256))
+    total = peso[-1]
+    peso_fundo = total - peso
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media_frente = soma / peso
+        media_fundo = (soma[-1] - soma) / peso_fundo
+        variancia = peso * peso_fundo * (media_frente - media_fundo) ** 2
+    return int(np.nanargmax(variancia))
+
+
+def _imagem_integral(escuro: np.ndarray) -> np.ndarray:
+    integral = np.zeros((escuro.shape[0] + 1, escuro.shape[1] + 1), dtype=np.int32)
+    np.cumsum(np.cumsum(escuro, axis=0, dtype=np.int32), axis=1, out=integral[1:, 1:])
+    return integral
+
+
+def _localizar_marca(escuro: np.ndarray, y0: int, x0: int, lado: int) -> np.ndarray:
+    """Centro (x, y) da janela lado x lado mais escura da região, refinado pelo centroide.
+
+    A busca grossa roda em meia resolução; só o refinamento usa a região inteira.
+    """
+    reduzido = escuro[::2, ::2]
+    meio_lado = max(2, lado // 2)
+    integral = _imagem_integral(reduzido)
+    somas = (integral[meio_lado:, meio_lado:] - integral[:-meio_lado, meio_lado:]
+             - integral[meio_lado:, :-meio_lado] + integral[:-meio_lado, :-meio_lado])
+    if somas.size == 0:
+        raise ErroLeitura('Imagem pequena demais para localizar as marcas de registro.')
+    iy, ix = np.unravel_index(np.argmax(somas), somas.shape)
+    if somas[iy, ix] < 0.6 * meio_lado * meio_lado:
+        raise ErroLeitura('Marca de registro não encontrada.')
+    iy, ix = 2 * iy, 2 * ix
+    janela = escuro[iy:iy + lado, ix:ix + lado]
+    ys, xs = np.nonzero(janela)
+    return np.array([x0 + ix + xs.mean(), y0 + iy + ys.mean()])
+
+
+def localizar_marcas(cinza: np.ndarray, limiar: int, modelo: ModeloGabarito,
+                     fracao_canto: float = 0.2) -> np.ndarray:
+    altura, largura = cinza.shape
+    # Tamanho esperado da marca na imagem; um pouco menor para tolerar rotação/escala
+    lado = max(3, int(modelo.lado_marca * largura / LARGURA * 0.8))
+    ch, cw = int(altura * fracao_canto), int(largura * fracao_canto)
+    cantos = [(0, 0), (0, largura - cw), (altura - ch, 0), (altura - ch, largura - cw)]
+    return np.array([
+        _localizar_marca(cinza[y0:y0 + ch, x0:x0 + cw] < limiar, y0, x0, lado) for y0, x0 in cantos
+    ])
+
+
+def transformacao_afim(origem: np.ndarray, destino: np.ndarray) -> np.ndarray:
+    """Matriz 3x2 (mínimos quadrados) tal que [x, y, 1] @ M ~ destino."""
+    a = np.hstack([origem, np.ones((len(origem), 1))])
+    matriz, *_ = np.linalg.lstsq(a, destino, rcond=None)
+    return matriz
+
+
+def ler_folha(cinza: np.ndarray, modelo: ModeloGabarito, limiar_marcado: float = 0.45) -> ResultadoLeitura:
+    """Lê uma folha em tons de cinza (uint8, 2D)."""
+    if cinza.ndim != 2:
+        raise ErroLeitura('A imagem deve estar em tons de cinza.')
+    cinza = np.asarray(cinza, dtype=np.uint8)
+    # Só os cantos e os pontos amostrados são binarizados, nunca a folha inteira
+    limiar = limiar_otsu(cinza)
+
+    marcas = localizar_marcas(cinza, limiar, modelo)
+    matriz = transformacao_afim(modelo.marcas, marcas)
+
+    pontos = modelo.amostras @ matriz[:2] + matriz[2]
+    xs = np.clip(np.rint(pontos[..., 0]).astype(np.intp), 0, cinza.shape[1] - 1)
+    ys = np.clip(np.rint(pontos[..., 1]).astype(np.intp), 0, cinza.shape[0] - 1)
+    preenchimento = (cinza[ys, xs] < limiar).mean(axis=-1, dtype=np.float32)
+
+    marcadas = preenchimento >= limiar_marcado
+    quantidade = marcadas.sum(axis=1)
+    respostas = np.argmax(preenchimento, axis=1).astype(np.int8)
+    respostas[quantidade == 0] = EM_BRANCO
+    respostas[quantidade > 1] = MULTIPLA
+    return ResultadoLeitura(respostas=respostas, preenchimento=preenchimento, marcas=marcas)
+
+
+def carregar_imagem(arquivo) -> np.ndarray:
+    """Decodifica um arquivo de imagem (caminho ou stream) para array uint8 em tons de cinza."""
+    from PIL import Image
+
+    with Image.open(arquivo) as imagem:
+        return np.asarray(imagem.convert('L'))
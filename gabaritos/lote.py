@@ -0,0 +1,225 @@
+"""Processamento de lotes de folhas (PDF com várias páginas, ZIP de imagens ou imagem avulsa).
+
+O arquivo enviado é gravado em disco em blocos, sem ser carregado na memória.
+Cada página é referenciada por (tipo, caminho, índice) e só é decodificada
+dentro do processo do pool que a lê, então o processo web nunca segura as
+imagens e o pool trabalha com no máximo 2 páginas em voo por processo.
+"""
+import io
+import multiprocessing
+import os
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from .armazenamento import ArmazemBlobs
+from .leitura import EM_BRANCO, ErroLeitura, carregar_imagem, ler_folha
+from .modelo import ModeloGabarito
+
+EXTENSOES_IMAGEM = ('.png', '.jpg', '.jpeg', '.tif', '.tiff', '.bmp')
+TAMANHO_BLOCO = 1024 * 1024
+
+
+class ErroLote(Exception):
+    pass
+
+
+def _erros_decodificacao():
+    """Exceções que indicam uma página corrompida ou ilegível (e não um defeito do código).
+
+    Além de ErroLeitura/OSError/ValueError: bombas de descompressão do PIL, ZIP
+    corrompido, item ausente do ZIP e erros do pdfium (RuntimeError).
+    """
+    from PIL import Image
+
+    return (ErroLeitura, OSError, ValueError, EOFError, KeyError, RuntimeError,
+            zipfile.BadZipFile, Image.DecompressionBombError)
+
+
+def salvar_upload(origem, destino: str, limite_bytes: int) -> int:
+    """Copia o stream `origem` para `destino` em blocos; retorna o total de bytes gravados.
+
+    Se a cópia falhar (inclusive por passar do limite), o arquivo parcial e a pasta
+    dele, se tiver ficado vazia, são removidos.
+    """
+    total = 0
+    try:
+        with open(destino, 'wb') as saida:
+            while True:
+                bloco = origem.read(TAMANHO_BLOCO)
+                if not bloco:
+                    break
+                total += len(bloco)
+                if total > limite_bytes:
+                    raise ErroLote('Arquivo maior que o limite permitido.')
+                saida.write(bloco)
+    except BaseException:
+        try:
+            os.remove(destino)
+            os.rmdir(os.path.dirname(destino))
+        except OSError:
+            pass  # pasta com outros arquivos (ou já removida)
+        raise
+    return total
+
+
+def listar_paginas(caminho: str):
+    """Referências (tipo, caminho, item) de cada página do arquivo, sem decodificar imagens."""
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao == '.zip' or zipfile.is_zipfile(caminho):
+        with zipfile.ZipFile(caminho) as arquivo:
+            nomes = sorted(
+                info.filename for info in arquivo.infolist()
+                if not info.is_dir() and info.filename.lower().endswith(EXTENSOES_IMAGEM)
+            )
+        return [('zip', caminho, nome) for nome in nomes]
+    if extensao == '.pdf':
+        pdfium = _importar_pdfium()
+        documento = pdfium.PdfDocument(caminho)
+        try:
+            return [('pdf', caminho, i) for i in range(len(documento))]
+        finally:
+            documento.close()
+    if extensao in EXTENSOES_IMAGEM:
+        return [('img', caminho, 0)]
+    raise ErroLote('Formato não suportado. Envie PDF, ZIP ou imagem.')
+
+
+def rotulo_pagina(pagina) -> str:
+    tipo, caminho, item = pagina
+    if tipo == 'zip':
+        return os.path.splitext(os.path.basename(item))[0]
+    if tipo == 'pdf':
+        return f'Página {item + 1}'
+    return os.path.basename(caminho)
+
+
+def _importar_pdfium():
+    try:
+        import pypdfium2
+    except ImportError:
+        raise ErroLote('Leitura de PDF requer o pacote pypdfium2.')
+    return pypdfium2
+
+
+def carregar_pagina(pagina, dpi: int = 100) -> np.ndarray:
+    tipo, caminho, item = pagina
+    if tipo == 'zip':
+        with zipfile.ZipFile(caminho) as arquivo, arquivo.open(item) as imagem:
+            return carregar_imagem(imagem)
+    if tipo == 'pdf':
+        documento = _importar_pdfium().PdfDocument(caminho)
+        try:
+            bitmap = documento[item].render(scale=dpi / 72, grayscale=True)
+            return np.asarray(bitmap.to_pil().convert('L'))
+        finally:
+            documento.close()
+    return carregar_imagem(caminho)
+
+
+def guardar_pagina(armazem: ArmazemBlobs, pagina) -> str:
+    """Grava a página no armazém e retorna o hash. PDFs são guardados já renderizados (PNG)."""
+    tipo, caminho, item = pagina
+    if tipo == 'zip':
+        with zipfile.ZipFile(caminho) as arquivo, arquivo.open(item) as origem:
+            return armazem.guardar_stream(origem)
+    if tipo == 'pdf':
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.fromarray(carregar_pagina(pagina)).save(buffer, 'PNG')
+        buffer.seek(0)
+        return armazem.guardar_stream(buffer)
+    with open(caminho, 'rb') as origem:
+        return armazem.guardar_stream(origem)
+
+
+def _ler_pagina(indice, pagina, questoes, alternativas, raiz_blobs=None):
+    """Executado no processo do pool. Retorna (indice, respostas, erro, hash)."""
+    modelo = _modelo_em_cache(questoes, alternativas)
+    hash_hex = ''
+    try:
+        if raiz_blobs:
+            armazem = ArmazemBlobs(raiz_blobs)
+            hash_hex = guardar_pagina(armazem, pagina)
+            cinza = carregar_imagem(armazem.caminho(hash_hex))
+        else:
+            cinza = carregar_pagina(pagina)
+        return indice, ler_folha(cinza, modelo).respostas, None, hash_hex
+    except _erros_decodificacao() as e:
+        # Só esta página falha; as demais do lote continuam
+        return indice, None, str(e) or type(e).__name__, hash_hex
+
+
+_modelos = {}
+
+
+def _modelo_em_cache(questoes, alternativas) -> ModeloGabarito:
+    chave = (questoes, alternativas)
+    if chave not in _modelos:
+        _modelos[chave] = ModeloGabarito(questoes=questoes, alternativas=alternativas)
+    return _modelos[chave]
+
+
+_executor = None
+
+
+def executor(processos=None) -> ProcessPoolExecutor:
+    """Pool compartilhado do processo atual, criado sob demanda.
+
+    Usa 'spawn' para os filhos não herdarem conexões de banco e threads do worker web.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=processos or os.cpu_count(),
+                                        mp_context=multiprocessing.get_context('spawn'))
+    return _executor
+
+
+def processar_paginas(paginas, questoes: int, alternativas: str, ao_progredir=None,
+                      intervalo_progresso: float = 1.0, processos=None, raiz_blobs=None):
+    """Lê todas as páginas no pool e retorna (respostas, falhas, erros, hashes).
+
+    respostas: (paginas, questoes) int8; falhas: (paginas,) bool; erros: {indice: mensagem};
+    hashes: (paginas,) str com o hash de cada página no armazém ('' sem `raiz_blobs`).
+    `ao_progredir(processadas, falhas)` é chamado no máximo a cada `intervalo_progresso` segundos.
+    """
+    processos = processos or os.cpu_count() or 1
+    pool = executor(processos)
+    total = len(paginas)
+    respostas = np.full((total, questoes), EM_BRANCO, dtype=np.int8)
+    falhas = np.zeros(total, dtype=bool)
+    hashes = np.full(total, '', dtype='<U64')
+    erros = {}
+    em_voo = set()
+    limite_em_voo = 2 * processos
+    proximas = iter(enumerate(paginas))
+    processadas = 0
+    ultimo_aviso = time.monotonic()
+
+    while True:
+        for indice, pagina in proximas:
+            em_voo.add(pool.submit(_ler_pagina, indice, pagina, questoes, alternativas, raiz_blobs))
+            if len(em_voo) >= limite_em_voo:
+                break
+        if not em_voo:
+            break
+        concluidas, em_voo = wait(em_voo, return_when=FIRST_COMPLETED)
+        for futuro in concluidas:
+            indice, lidas, erro, hashes[indice] = futuro.result()
+            if erro is None:
+                respostas[indice] = lidas
+            else:
+                falhas[indice] = True
+                erros[indice] = erro
+            processadas += 1
+        agora = time.monotonic()
+        if ao_progredir and agora - ultimo_aviso >= intervalo_progresso:
+            ao_progredir(processadas, int(falhas.sum()))
+            ultimo_aviso = agora
+
+    if ao_progredir:
+        ao_progredir(processadas, int(falhas.sum()))
+    return respostas, falhas, erros, hashes
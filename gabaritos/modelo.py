@@ -0,0 +1,90 @@
+"""Modelo (template) de folha de respostas.
+
+Todas as coordenadas ficam num sistema canônico de LARGURA x ALTURA unidades
+(proporção A4). A leitura só precisa mapear esse sistema para a imagem usando
+as quatro marcas de registro dos cantos.
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+
+LARGURA = 1000.0
+ALTURA = 1414.0
+
+# Limites aceitos nos formulários; o custo do modelo cresce com questões x alternativas
+MAX_QUESTOES = 500
+MAX_ALTERNATIVAS = 10
+
+
+def validar_parametros(questoes, alternativas) -> tuple:
+    """(questoes, alternativas) normalizados, ou ValueError (com mensagem para o usuário) fora dos limites."""
+    try:
+        questoes = int(questoes)
+    except (TypeError, ValueError):
+        raise ValueError('Número de questões inválido.') from None
+    alternativas = (alternativas or 'ABCDE').strip().upper()
+    if not 1 <= questoes <= MAX_QUESTOES:
+        raise ValueError(f'Número de questões deve estar entre 1 e {MAX_QUESTOES}.')
+    if (not 2 <= len(alternativas) <= MAX_ALTERNATIVAS or not alternativas.isascii()
+            or not alternativas.isalpha() or len(set(alternativas)) != len(alternativas)):
+        raise ValueError(f'Alternativas devem ser de 2 a {MAX_ALTERNATIVAS} letras distintas.')
+    return questoes, alternativas
+
+
+@dataclass
+class ModeloGabarito:
+    questoes: int = 50
+    alternativas: str = 'ABCDE'
+    linhas_por_coluna: int = 25
+    lado_marca: float = 40.0
+    raio_bolha: float = 12.0
+    espaco_alternativa: float = 40.0
+    # Área útil das bolhas (canônica)
+    topo: float = 200.0
+    base: float = 1300.0
+    margem_esquerda: float = 110.0
+    margem_direita: float = 900.0
+    # Pontos amostrados dentro de cada bolha, relativos ao raio
+    fracao_amostra: float = 0.7
+    passos_amostra: int = 7
+
+    marcas: np.ndarray = field(init=False, repr=False)
+    centros: np.ndarray = field(init=False, repr=False)
+    amostras: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self):
+        meio = self.lado_marca / 2 + 30
+        # Ordem: superior esquerda, superior direita, inferior esquerda, inferior direita
+        self.marcas = np.array([
+            [meio, meio], [LARGURA - meio, meio],
+            [meio, ALTURA - meio], [LARGURA - meio, ALTURA - meio],
+        ])
+        self.centros = self._calcular_centros()
+        self.amostras = self._calcular_amostras()
+
+    @property
+    def num_alternativas(self) -> int:
+        return len(self.alternativas)
+
+    @property
+    def colunas(self) -> int:
+        return -(-self.questoes // self.linhas_por_coluna)
+
+    def _calcular_centros(self) -> np.ndarray:
+        """Centros das bolhas, shape (questoes, alternativas, 2) em (x, y)."""
+        q = np.arange(self.questoes)
+        coluna, linha = np.divmod(q, self.linhas_por_coluna)
+        largura_coluna = (self.margem_direita - self.margem_esquerda) / self.colunas
+        passo_linha = (self.base - self.topo) / self.linhas_por_coluna
+        x0 = self.margem_esquerda + coluna * largura_coluna + self.espaco_alternativa
+        y = self.topo + (linha + 0.5) * passo_linha
+        x = x0[:, None] + np.arange(self.num_alternativas)[None, :] * self.espaco_alternativa
+        return np.stack([x, np.broadcast_to(y[:, None], x.shape)], axis=-1)
+
+    def _calcular_amostras(self) -> np.ndarray:
+        """Pontos de amostragem em disco para cada bolha, shape (questoes, alternativas, K, 2)."""
+        eixo = np.linspace(-1.0, 1.0, self.passos_amostra)
+        dx, dy = np.meshgrid(eixo, eixo)
+        dentro = dx ** 2 + dy ** 2 <= 1.0
+        deslocamentos = np.stack([dx[dentro], dy[dentro]], axis=-1) * self.raio_bolha * self.fracao_amostra
+        return self.centros[:, :, None, :] + deslocamentos[None, None, :, :]
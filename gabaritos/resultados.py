@@ -0,0 +1,159 @@
+"""Resultados de uma prova em forma colunar.
+
+Cada prova (lote) é uma matriz alunos x questões de int8 (índice da
+alternativa, EM_BRANCO ou MULTIPLA) gravada em .npy e aberta com mmap.
+Correção, estatísticas por questão e ranking são operações sobre a matriz
+inteira, então corrigir de novo após mudar o gabarito custa milissegundos.
+"""
+import csv
+import io
+import os
+
+import numpy as np
+
+from .leitura import EM_BRANCO, MULTIPLA
+
+ANULADA = '*'
+
+
+class ResultadosProva:
+    def __init__(self, respostas: np.ndarray, alternativas: str = 'ABCDE', falhas=None, rotulos=None):
+        self.alternativas = alternativas
+        validas = np.ones(len(respostas), dtype=bool) if falhas is None else ~np.asarray(falhas, dtype=bool)
+        if rotulos is None:
+            rotulos = np.array([f'Página {i + 1}' for i in range(len(validas))])
+        # Páginas que não puderam ser lidas ficam fora da correção (sem cópia se todas foram lidas)
+        self.respostas = np.asarray(respostas) if validas.all() else np.asarray(respostas)[validas]
+        self.rotulos = np.asarray(rotulos)[validas]
+        self.indices = np.flatnonzero(validas)  # índice da página original de cada aluno
+
+    @classmethod
+    def carregar(cls, diretorio: str, alternativas: str = 'ABCDE'):
+        respostas = np.load(os.path.join(diretorio, 'respostas.npy'), mmap_mode='r')
+        falhas = np.load(os.path.join(diretorio, 'falhas.npy'))
+        caminho_rotulos = os.path.join(diretorio, 'paginas.npy')
+        rotulos = np.load(caminho_rotulos) if os.path.exists(caminho_rotulos) else None
+        return cls(respostas, alternativas, falhas, rotulos)
+
+    @property
+    def alunos(self) -> int:
+        return self.respostas.shape[0]
+
+    @property
+    def questoes(self) -> int:
+        return self.respostas.shape[1]
+
+    def codificar_gabarito(self, gabarito: str):
+        """Gabarito em letras -> índices (ANULADA vira -1, vale para todos); None se não há gabarito.
+
+        O gabarito precisa ter exatamente uma letra por questão, todas entre as
+        alternativas da prova ou ANULADA; caso contrário levanta ValueError com
+        a mensagem para o usuário.
+        """
+        gabarito = (gabarito or '').strip().upper()
+        if not gabarito:
+            return None
+        if len(gabarito) != self.questoes:
+            raise ValueError(f'O gabarito precisa ter {self.questoes} letras (uma por questão); foram informadas {len(gabarito)}.')
+        invalidas = sorted(set(gabarito) - set(self.alternativas) - {ANULADA})
+        if invalidas:
+            raise ValueError(f'Letras inválidas no gabarito: {", ".join(invalidas)}. '
+                             f'Use {", ".join(self.alternativas)} ou {ANULADA} para anular.')
+        return np.array([-1 if letra == ANULADA else self.alternativas.index(letra) for letra in gabarito],
+                        dtype=np.int8)
+
+    def acertos(self, chave: np.ndarray) -> np.ndarray:
+        """Matriz booleana alunos x questões."""
+        return (self.respostas == chave[None, :]) | (chave < 0)[None, :]
+
+    def notas(self, chave: np.ndarray) -> np.ndarray:
+        return self.acertos(chave).sum(axis=1, dtype=np.int32)
+
+    def ranking(self, notas: np.ndarray):
+        """(ordem, posicao): índices do maior para o menor e posição com empates (1, 2, 2, 4...)."""
+        ordem = np.argsort(-notas, kind='stable')
+        ordenadas = np.sort(notas)
+        posicao = len(notas) - np.searchsorted(ordenadas, notas, side='right') + 1
+        return ordem, posicao
+
+    def estatisticas(self, chave) -> dict:
+        """Estatísticas por questão.
+
+        dificuldade: fração de acertos; discriminacao: correlação ponto-bisserial entre
+        acertar a questão e a nota nas demais; distribuicao: contagem por alternativa,
+        com as colunas finais para em branco e múltipla marcação. Sem gabarito
+        (`chave` None) só a distribuição é calculada.
+        """
+        distribuicao = self._distribuicao()
+        if chave is None:
+            return {'dificuldade': None, 'discriminacao': None, 'distribuicao': distribuicao, 'alunos': self.alunos}
+
+        acertos = self.acertos(chave)
+        dificuldade = acertos.mean(axis=0) if self.alunos else np.zeros(self.questoes)
+
+        item = acertos.astype(np.float64)
+        restante = acertos.sum(axis=1, keepdims=True) - item
+        item -= item.mean(axis=0)
+        restante -= restante.mean(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            discriminacao = (item * restante).sum(axis=0) / np.sqrt(
+                (item ** 2).sum(axis=0) * (restante ** 2).sum(axis=0))
+        discriminacao = np.nan_to_num(discriminacao)
+
+        return {
+            'dificuldade': dificuldade,
+            'discriminacao': discriminacao,
+            'distribuicao': distribuicao,
+            'alunos': self.alunos,
+        }
+
+    def _distribuicao(self) -> np.ndarray:
+        # Códigos deslocados: alternativas 0..k-1, depois em branco (k) e múltipla (k+1)
+        k = len(self.alternativas)
+        codigos = self.respostas.astype(np.int32)
+        codigos = np.where(codigos == EM_BRANCO, k, np.where(codigos == MULTIPLA, k + 1, codigos))
+        linear = codigos + (k + 2) * np.arange(self.questoes)[None, :]
+        return np.bincount(linear.ravel(), minlength=self.questoes * (k + 2)).reshape(self.questoes, k + 2)
+
+    def letras(self) -> np.ndarray:
+        """Matriz de strings com as respostas em letras ('' em branco, '*' múltipla)."""
+        tabela = np.array(['*', ''] + list(self.alternativas), dtype=object)
+        return tabela[self.respostas.astype(np.intp) + 2]
+
+    def _linhas_exportacao(self, chave):
+        letras = self.letras()
+        questoes = [f'Q{i + 1}' for i in range(self.questoes)]
+        if chave is None:
+            # Prova ainda não corrigida: só as respostas, na ordem das páginas
+            yield ['Aluno'] + questoes
+            for i in range(self.alunos):
+                yield [str(self.rotulos[i])] + list(letras[i])
+            return
+        notas = self.notas(chave)
+        ordem, posicao = self.ranking(notas)
+        percentual = np.round(100.0 * notas / max(1, self.questoes), 1)
+        yield ['Posição', 'Aluno', 'Acertos', 'Nota (%)'] + questoes
+        for i in ordem:
+            yield [int(posicao[i]), str(self.rotulos[i]), int(notas[i]), float(percentual[i])] + list(letras[i])
+
+    def exportar_csv(self, chave):
+        """Gera o CSV em pedaços (para resposta em streaming)."""
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer, delimiter=';')
+        for numero, linha in enumerate(self._linhas_exportacao(chave)):
+            escritor.writerow(linha)
+            if numero % 500 == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    def exportar_xlsx(self, chave, destino):
+        """Grava um XLSX (requer openpyxl) em `destino` (caminho ou arquivo)."""
+        from openpyxl import Workbook
+
+        planilha = Workbook(write_only=True)
+        aba = planilha.create_sheet('Resultados')
+        for linha in self._linhas_exportacao(chave):
+            aba.append(linha)
+        planilha.save(destino)
@@ -0,0 +1,66 @@
+"""Gerador de folhas sintéticas para testes e benchmarks do leitor."""
+import numpy as np
+
+from .leitura import EM_BRANCO
+from .modelo import ALTURA, LARGURA, ModeloGabarito
+
+BRANCO = 245
+TINTA = 30
+CONTORNO = 90
+
+
+def respostas_aleatorias(modelo: ModeloGabarito, rng=None, fracao_branco: float = 0.0) -> np.ndarray:
+    rng = np.random.default_rng(rng)
+    respostas = rng.integers(0, modelo.num_alternativas, size=modelo.questoes).astype(np.int8)
+    respostas[rng.random(modelo.questoes) < fracao_branco] = EM_BRANCO
+    return respostas
+
+
+def _desenhar_canonico(modelo: ModeloGabarito, marcadas: np.ndarray) -> np.ndarray:
+    """Folha na resolução canônica (1 unidade = 1 pixel). marcadas: (questoes, alternativas) bool."""
+    folha = np.full((int(ALTURA), int(LARGURA)), BRANCO, dtype=np.uint8)
+    meio = modelo.lado_marca / 2
+    for x, y in modelo.marcas:
+        folha[int(y - meio):int(y + meio), int(x - meio):int(x + meio)] = TINTA
+
+    r = int(np.ceil(modelo.raio_bolha)) + 1
+    dy, dx = np.mgrid[-r:r + 1, -r:r + 1]
+    distancia = np.hypot(dx, dy)
+    disco = distancia <= modelo.raio_bolha
+    anel = disco & (distancia >= modelo.raio_bolha - 2)
+    for (x, y), marcada in zip(modelo.centros.reshape(-1, 2), marcadas.ravel()):
+        bloco = folha[int(y) - r:int(y) + r + 1, int(x) - r:int(x) + r + 1]
+        bloco[disco if marcada else anel] = TINTA if marcada else CONTORNO
+    return folha
+
+
+def gerar_folha(modelo: ModeloGabarito, respostas, escala: float = 0.85, angulo: float = 0.0,
+                deslocamento=(0.0, 0.0), ruido: float = 0.0, rng=None) -> np.ndarray:
+    """Imagem uint8 de uma folha preenchida com `respostas` (índices, EM_BRANCO para vazio).
+
+    `angulo` em graus e `deslocamento` em pixels simulam o desalinhamento do scanner.
+    """
+    respostas = np.asarray(respostas)
+    marcadas = np.zeros((modelo.questoes, modelo.num_alternativas), dtype=bool)
+    preenchidas = respostas >= 0
+    marcadas[np.nonzero(preenchidas)[0], respostas[preenchidas]] = True
+    canonica = _desenhar_canonico(modelo, marcadas)
+
+    altura, largura = int(round(ALTURA * escala)), int(round(LARGURA * escala))
+    ys, xs = np.indices((altura, largura), dtype=np.float64)
+    # Transformação inversa: pixel de saída -> coordenada canônica
+    cx, cy = largura / 2 + deslocamento[0], altura / 2 + deslocamento[1]
+    theta = np.deg2rad(angulo)
+    cos, sen = np.cos(theta), np.sin(theta)
+    rx, ry = xs - cx, ys - cy
+    u = (cos * rx + sen * ry) / escala + LARGURA / 2
+    v = (-sen * rx + cos * ry) / escala + ALTURA / 2
+    ui, vi = np.rint(u).astype(np.intp), np.rint(v).astype(np.intp)
+    dentro = (ui >= 0) & (ui < canonica.shape[1]) & (vi >= 0) & (vi < canonica.shape[0])
+    imagem = np.full((altura, largura), BRANCO, dtype=np.uint8)
+    imagem[dentro] = canonica[vi[dentro], ui[dentro]]
+
+    if ruido > 0:
+        rng = np.random.default_rng(rng)
+        imagem = np.clip(imagem + rng.normal(0, ruido, imagem.shape), 0, 255).astype(np.uint8)
+    return imagem
@@ -0,0 +1,192 @@
+"""Barramento de invalidação de caches entre processos (workers do gunicorn).
+
+Caches em memória assinam um tipo de evento (`'usuario'`...) com a função
+que descarta uma chave. Alterações em modelos observados (ou chamadas
+explícitas a `publicar`) viram eventos gravados na própria transação:
+
+- no PostgreSQL, `pg_notify`, entregue aos outros processos só se a transação
+  for confirmada; cada processo mantém uma conexão com LISTEN numa thread;
+- nos demais bancos (SQLite), uma linha na tabela de versões, com um número
+  de versão crescente; cada processo consulta as versões novas a cada
+  `intervalo` segundos.
+
+No processo que fez o commit, os caches são invalidados logo após o commit
+(`after_commit`). Com isso os caches podem usar TTLs longos: o TTL só cobre
+eventos perdidos. Nos workers web o ouvinte sobe na primeira requisição de
+cada processo; processos sem requisições (worker da fila, comandos de longa
+duração) chamam `iniciar()`. Ao (re)conectar o LISTEN, os caches são esvaziados, porque
+avisos enviados enquanto a conexão estava fora se perderam.
+"""
+import os
+import re
+import select as select_io
+import threading
+
+import sqlalchemy as sa
+
+
+class BarramentoInvalidacao:
+    def __init__(self, app=None, db=None, modelo=None, canal: str = 'invalidacao_cache', intervalo: float = 1.0):
+        if not re.fullmatch(r'[a-z_][a-z0-9_]*', canal):
+            raise ValueError(f'Nome de canal inválido: {canal}')
+        self.canal = canal
+        self.intervalo = intervalo
+        self.modelo = modelo
+        self.assinantes = {}    # tipo -> [(invalidar, limpar)]
+        self.observados = []    # (modelo, tipo, chave)
+        self._pid = None
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        self.db = db
+        self.logger = app.logger
+        with app.app_context():
+            self.engine = db.engine
+        self.postgres = self.engine.dialect.name == 'postgresql'
+        app.extensions['invalidacao'] = self
+        sa.event.listen(db.session, 'after_flush', self._ao_gravar)
+        sa.event.listen(db.session, 'after_commit', self._ao_confirmar)
+        sa.event.listen(db.session, 'after_soft_rollback', self._ao_desfazer)
+        app.before_request(self.iniciar)
+
+    # --- Registro ---
+
+    def assinar(self, tipo: str, invalidar, limpar=None):
+        """`invalidar(chave)` descarta uma chave (sempre str); `limpar()` esvazia o cache inteiro."""
+        self.assinantes.setdefault(tipo, []).append((invalidar, limpar))
+
+    def observar(self, modelo, tipo: str, chave):
+        """Publica (tipo, chave(obj)) sempre que uma instância de `modelo` for criada, alterada ou removida."""
+        self.observados.append((modelo, tipo, chave))
+
+    # --- Publicação ---
+
+    def publicar(self, tipo: str, chave, sessao=None):
+        """Registra o evento na transação atual; ele vale quando ela for confirmada."""
+        sessao = sessao or self.db.session()
+        self._emitir(sessao, {(tipo, str(chave))})
+
+    def _emitir(self, sessao, eventos):
+        pendentes = sessao.info.setdefault('invalidacoes', set())
+        novos = eventos - pendentes
+        if not novos:
+            return
+        pendentes.update(novos)
+        # Sempre no primário, mesmo numa requisição de leitura roteada para uma réplica
+        conexao = sessao.connection(bind_arguments={'bind': self.engine})
+        if self.postgres:
+            for tipo, chave in novos:
+                conexao.execute(sa.select(sa.func.pg_notify(self.canal, f'{tipo}:{chave}')))
+            return
+        tabela = self.modelo.__table__
+        for tipo, chave in novos:
+            proxima = sa.select(sa.func.coalesce(sa.func.max(tabela.c.versao), 0) + 1).scalar_subquery()
+            resultado = conexao.execute(
+                sa.update(tabela).where(tabela.c.tipo == tipo, tabela.c.chave == chave).values(versao=proxima))
+            if resultado.rowcount == 0:
+                conexao.execute(sa.insert(tabela).values(tipo=tipo, chave=chave, versao=proxima))
+
+    def _ao_gravar(self, sessao, contexto_flush):
+        if not self.observados:
+            return
+        eventos = set()
+        alterados = (objeto for objeto in sessao.dirty if sessao.is_modified(objeto))
+        for objeto in (*sessao.new, *alterados, *sessao.deleted):
+            for modelo, tipo, chave in self.observados:
+                if isinstance(objeto, modelo):
+                    eventos.add((tipo, str(chave(objeto))))
+        if eventos:
+            self._emitir(sessao, eventos)
+
+    def _ao_confirmar(self, sessao):
+        for tipo, chave in sessao.info.pop('invalidacoes', ()):
+            self._despachar(tipo, chave)
+
+    def _ao_desfazer(self, sessao, transacao_anterior):
+        if not transacao_anterior.parent:
+            sessao.info.pop('invalidacoes', None)
+
+    # --- Recebimento ---
+
+    def _despachar(self, tipo, chave):
+        for invalidar, _ in self.assinantes.get(tipo, ()):
+            try:
+                invalidar(chave)
+            except Exception:
+                self.logger.exception(f'Erro ao invalidar {tipo}:{chave}')
+
+    def _limpar_tudo(self):
+        for assinantes in self.assinantes.values():
+            for _, limpar in assinantes:
+                if limpar is not None:
+                    limpar()
+
+    def _receber(self, aviso: str):
+        tipo, _, chave = aviso.partition(':')
+        self._despachar(tipo, chave)
+
+    def iniciar(self):
+        """Sobe a thread ouvinte deste processo (idempotente)."""
+        # Uma thread por processo; depois de um fork (workers do gunicorn) ela precisa ser recriada
+        if self._pid == os.getpid() or not self.assinantes:
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            alvo = self._ouvir_postgres if self.postgres else self._consultar_versoes
+            threading.Thread(target=alvo, name='invalidacao-cache', daemon=True).start()
+
+    def _ouvir_postgres(self):
+        while not self._parar.is_set():
+            bruta = None
+            try:
+                bruta = self.engine.raw_connection()
+                bruta.detach()  # fica com esta thread; não volta para o pool
+                conexao = bruta.driver_connection
+                conexao.autocommit = True
+                conexao.cursor().execute(f'LISTEN {self.canal}')
+                self._limpar_tudo()
+                if hasattr(conexao, 'poll'):  # psycopg2
+                    while not self._parar.is_set():
+                        if select_io.select([conexao], [], [], self.intervalo)[0]:
+                            conexao.poll()
+                            while conexao.notifies:
+                                self._receber(conexao.notifies.pop(0).payload)
+                else:  # psycopg 3
+                    while not self._parar.is_set():
+                        for aviso in conexao.notifies(timeout=self.intervalo):
+                            self._receber(aviso.payload)
+            except Exception:
+                self.logger.warning('Conexão LISTEN de invalidação de cache perdida; reconectando.', exc_info=True)
+                self._parar.wait(5)
+            finally:
+                if bruta is not None:
+                    bruta.close()
+
+    def _consultar_versoes(self):
+        tabela = self.modelo.__table__
+        ultima = None
+        while not self._parar.is_set():
+            try:
+                with self.engine.connect() as conexao:
+                    if ultima is None:
+                        ultima = conexao.execute(sa.select(sa.func.max(tabela.c.versao))).scalar() or 0
+                        linhas = []
+                    else:
+                        linhas = conexao.execute(
+                            sa.select(tabela.c.tipo, tabela.c.chave, tabela.c.versao)
+                            .where(tabela.c.versao > ultima)).all()
+            except Exception:
+                self.logger.warning('Falha ao consultar versões de cache.', exc_info=True)
+                linhas = []
+            for tipo, chave, versao in linhas:
+                self._despachar(tipo, chave)
+                ultima = max(ultima, versao)
+            self._parar.wait(self.intervalo)
+
+    def parar(self):
+        self._parar.set()
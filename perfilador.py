@@ -0,0 +1,189 @@
+"""Perfilador por amostragem, sob demanda, para requisições em produção.
+
+Desligado por padrão. Com PROFILER_ATIVO, uma requisição é perfilada quando
+traz o cabeçalho `X-Perfil: 1`, vem de um usuário logado com `admin` e passa
+no sorteio da taxa (`X-Perfil-Taxa`, padrão PROFILER_TAXA). Só cabeçalhos são
+aceitos: um parâmetro na URL acabaria em links, histórico e logs de acesso.
+Enquanto ela roda, uma thread amostra a pilha da thread da requisição a cada
+PROFILER_INTERVALO_MS; no teardown da requisição (que roda mesmo quando ela
+levanta exceção) a thread é parada e são gravados em PROFILER_DIR:
+
+- `<nome>.folded`: pilhas no formato "collapsed" (flamegraph.pl, speedscope);
+- `<nome>.json`: tempos por categoria (template, db, bcrypt, serializacao).
+
+Com o recurso desligado nenhum hook é registrado e `cronometrar` é um no-op.
+"""
+import contextlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from flask import g, has_request_context, request, template_rendered, before_render_template
+from flask.json.provider import DefaultJSONProvider
+from flask_login import current_user
+
+
+class AmostradorPilha(threading.Thread):
+    def __init__(self, thread_id: int, intervalo: float):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.intervalo = intervalo
+        self.pilhas = Counter()
+        self._parar = threading.Event()
+
+    def run(self):
+        while not self._parar.wait(self.intervalo):
+            frame = sys._current_frames().get(self.thread_id)
+            nomes = []
+            while frame is not None:
+                codigo = frame.f_code
+                nomes.append(f'{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})')
+                frame = frame.f_back
+            if nomes:
+                self.pilhas[';'.join(reversed(nomes))] += 1
+
+    def parar(self):
+        self._parar.set()
+        self.join()
+
+
+class ProvedorJSONCronometrado(DefaultJSONProvider):
+    """Provedor JSON padrão do Flask que contabiliza o tempo de serialização."""
+
+    def dumps(self, obj, **kwargs):
+        with cronometrar('serializacao'):
+            return super().dumps(obj, **kwargs)
+
+
+@contextlib.contextmanager
+def _cronometro(perfil, categoria):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        perfil['tempos'][categoria] = perfil['tempos'].get(categoria, 0.0) + time.perf_counter() - inicio
+        perfil['contagens'][categoria] = perfil['contagens'].get(categoria, 0) + 1
+
+
+def cronometrar(categoria: str):
+    """Soma o tempo do bloco na categoria, se a requisição atual estiver sendo perfilada."""
+    perfil = g.get('perfil') if has_request_context() else None
+    if perfil is None:
+        return contextlib.nullcontext()
+    return _cronometro(perfil, categoria)
+
+
+class Perfilador:
+    def __init__(self, app=None, db=None):
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db=None):
+        self.ativo = app.config.get('PROFILER_ATIVO', False)
+        if not self.ativo:
+            return
+        self.taxa = float(app.config.get('PROFILER_TAXA', 1.0))
+        self.intervalo = app.config.get('PROFILER_INTERVALO_MS', 5) / 1000.0
+        self.diretorio = app.config.get('PROFILER_DIR') or os.path.join(app.instance_path, 'perfis')
+        app.json = ProvedorJSONCronometrado(app)
+        app.before_request(self._iniciar)
+        app.after_request(self._marcar_resposta)
+        app.teardown_request(self._finalizar)
+        before_render_template.connect(self._antes_template, app)
+        template_rendered.connect(self._depois_template, app)
+        if db is not None:
+            with app.app_context():
+                for engine in db.engines.values():
+                    self._instrumentar_engine(engine)
+
+    def _solicitado(self) -> bool:
+        # O cabeçalho vem primeiro: sem ele o usuário nem é carregado (endpoint da ESP32)
+        if request.headers.get('X-Perfil') != '1':
+            return False
+        if not (current_user.is_authenticated and getattr(current_user, 'admin', False)):
+            return False
+        try:
+            taxa = float(request.headers.get('X-Perfil-Taxa') or self.taxa)
+        except ValueError:
+            taxa = self.taxa
+        return random.random() < taxa
+
+    def _iniciar(self):
+        if not self._solicitado():
+            return
+        amostrador = AmostradorPilha(threading.get_ident(), self.intervalo)
+        g.perfil = {'inicio': time.perf_counter(), 'tempos': {}, 'contagens': {}, 'amostrador': amostrador}
+        amostrador.start()
+
+    def _marcar_resposta(self, response):
+        perfil = g.get('perfil')
+        if perfil is not None:
+            perfil['status'] = response.status_code
+            response.headers['X-Perfil'] = perfil['nome'] = self._nome()
+        return response
+
+    def _finalizar(self, erro=None):
+        perfil = g.pop('perfil', None)
+        if perfil is None:
+            return
+        perfil['amostrador'].parar()
+        total = time.perf_counter() - perfil['inicio']
+        # Sem after_request (exceção não tratada) o status é o do erro
+        nome = perfil.get('nome') or self._nome()
+        try:
+            os.makedirs(self.diretorio, exist_ok=True)
+            with open(os.path.join(self.diretorio, f'{nome}.folded'), 'w', encoding='utf-8') as saida:
+                for pilha, contagem in perfil['amostrador'].pilhas.most_common():
+                    saida.write(f'{pilha} {contagem}\n')
+            medidos = sum(perfil['tempos'].values())
+            with open(os.path.join(self.diretorio, f'{nome}.json'), 'w', encoding='utf-8') as saida:
+                json.dump({
+                    'endpoint': request.endpoint,
+                    'metodo': request.method,
+                    'caminho': request.path,
+                    'status': perfil.get('status', 500),
+                    'erro': repr(erro) if erro is not None else None,
+                    'total_ms': round(total * 1000, 3),
+                    'tempos_ms': {k: round(v * 1000, 3) for k, v in perfil['tempos'].items()},
+                    'contagens': perfil['contagens'],
+                    'outros_ms': round(max(0.0, total - medidos) * 1000, 3),
+                    'amostras': sum(perfil['amostrador'].pilhas.values()),
+                }, saida, ensure_ascii=False, indent=2)
+        except OSError:
+            pass
+
+    def _nome(self) -> str:
+        return f"{datetime.utcnow():%Y%m%dT%H%M%S%f}_{request.endpoint or 'desconhecido'}"
+
+    def _antes_template(self, sender, template, context, **extra):
+        perfil = g.get('perfil')
+        if perfil is not None:
+            perfil.setdefault('_templates', []).append(time.perf_counter())
+
+    def _depois_template(self, sender, template, context, **extra):
+        perfil = g.get('perfil')
+        if perfil is not None and perfil.get('_templates'):
+            inicio = perfil['_templates'].pop()
+            perfil['tempos']['template'] = perfil['tempos'].get('template', 0.0) + time.perf_counter() - inicio
+            perfil['contagens']['template'] = perfil['contagens'].get('template', 0) + 1
+
+    def _instrumentar_engine(self, engine):
+        from sqlalchemy import event
+
+        @event.listens_for(engine, 'before_cursor_execute')
+        def antes(conn, cursor, statement, parameters, context, executemany):
+            if has_request_context() and g.get('perfil') is not None:
+                conn.info.setdefault('_perfil_inicio', []).append(time.perf_counter())
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def depois(conn, cursor, statement, parameters, context, executemany):
+            inicios = conn.info.get('_perfil_inicio')
+            if inicios and has_request_context() and g.get('perfil') is not None:
+                perfil = g.perfil
+                perfil['tempos']['db'] = perfil['tempos'].get('db', 0.0) + time.perf_counter() - inicios.pop()
+                perfil['contagens']['db'] = perfil['contagens'].get('db', 0) + 1
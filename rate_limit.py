@@ -0,0 +1,122 @@
+"""Limitador token bucket por chave, com estado compartilhado entre workers.
+
+Com `caminho` definido (e fcntl disponível), os baldes ficam numa tabela de
+tamanho fixo mapeada em memória (mmap) num arquivo local, protegida por flock,
+de modo que todos os workers do gunicorn no mesmo host enxergam o mesmo saldo.
+Sem arquivo (ex.: desenvolvimento no Windows), o estado fica num dict do processo.
+"""
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Cada slot: hash da chave (8 bytes), tokens restantes, instante da última recarga
+_SLOT = struct.Struct('<Qdd')
+_SONDAGENS = 8
+
+
+def _hash_chave(chave: str) -> int:
+    valor = int.from_bytes(hashlib.blake2b(chave.encode('utf-8'), digest_size=8).digest(), 'little')
+    return valor or 1  # 0 marca slot vazio
+
+
+def fase_da_chave(chave: str, periodo: int) -> int:
+    """Deslocamento estável em [0, periodo) derivado da chave (usado para espalhar a frota)."""
+    return _hash_chave(chave) % periodo if periodo > 0 else 0
+
+
+class TokenBucketLimiter:
+    def __init__(self, taxa_por_segundo, capacidade, caminho=None, slots=4096):
+        self.taxa = float(taxa_por_segundo)
+        self.capacidade = float(capacidade)
+        self.slots = slots
+        self._lock = threading.Lock()
+        self._local = {}
+        self._mmap = None
+        self._fd = None
+        if caminho and fcntl is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+            tamanho = slots * _SLOT.size
+            self._fd = os.open(caminho, os.O_RDWR | os.O_CREAT, 0o600)
+            if os.fstat(self._fd).st_size != tamanho:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+                try:
+                    if os.fstat(self._fd).st_size != tamanho:
+                        os.ftruncate(self._fd, tamanho)
+                finally:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+            self._mmap = mmap.mmap(self._fd, tamanho)
+
+    def _recarregar(self, tokens, ultimo, agora):
+        return min(self.capacidade, tokens + max(0.0, agora - ultimo) * self.taxa)
+
+    def _resultado(self, tokens):
+        """Consome um token se houver; retorna (permitido, novos_tokens, retry_after)."""
+        if tokens >= 1.0:
+            return True, tokens - 1.0, 0.0
+        return False, tokens, (1.0 - tokens) / self.taxa
+
+    def consumir(self, chave: str):
+        """Tenta consumir um token da chave. Retorna (permitido, segundos_para_tentar_de_novo)."""
+        return self._acessar(chave, consumir=True)
+
+    def esgotado(self, chave: str):
+        """Como `consumir`, mas só consulta: não gasta token nem ocupa slot para chaves sem balde."""
+        return self._acessar(chave, consumir=False)
+
+    def _acessar(self, chave, consumir):
+        agora = time.time()
+        with self._lock:
+            if self._mmap is None:
+                if not consumir and chave not in self._local:
+                    return True, 0.0
+                tokens, ultimo = self._local.get(chave, (self.capacidade, agora))
+                permitido, tokens, espera = self._resultado(self._recarregar(tokens, ultimo, agora))
+                if consumir:
+                    self._local[chave] = (tokens, agora)
+                return permitido, espera
+
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                return self._consumir_compartilhado(_hash_chave(chave), agora, consumir)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _consumir_compartilhado(self, hash_chave, agora, consumir=True):
+        base = hash_chave % self.slots
+        escolhido = None
+        mais_antigo = None
+        for i in range(_SONDAGENS):
+            slot = (base + i) % self.slots
+            h, tokens, ultimo = _SLOT.unpack_from(self._mmap, slot * _SLOT.size)
+            if h == hash_chave:
+                escolhido = slot
+                break
+            if h == 0:
+                escolhido, tokens, ultimo = slot, self.capacidade, agora
+                break
+            if mais_antigo is None or ultimo < mais_antigo[1]:
+                mais_antigo = (slot, ultimo)
+        else:
+            # Vizinhança cheia: reaproveita o balde usado há mais tempo
+            escolhido, tokens, ultimo = mais_antigo[0], self.capacidade, agora
+
+        if not consumir and h != hash_chave:
+            return True, 0.0  # chave sem balde: saldo cheio
+        permitido, tokens, espera = self._resultado(self._recarregar(tokens, ultimo, agora))
+        if not consumir:
+            return permitido, espera
+        _SLOT.pack_into(self._mmap, escolhido * _SLOT.size, hash_chave, tokens, agora)
+        return permitido, espera
+
+
+def retry_after_header(segundos: float) -> str:
+    return str(max(1, math.ceil(segundos)))
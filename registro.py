@@ -0,0 +1,160 @@
+"""Logging sem bloqueio: fila em memória, thread escritora, JSON e amostragem.
+
+`configurar_logging(app)` troca os handlers do `app.logger` por um
+`QueueHandler` ligado a uma fila limitada; uma thread (`QueueListener`) é a
+única que escreve em stdout/arquivo. Se a fila encher, a mensagem é descartada
+e contada em vez de travar a requisição. A thread é criada por processo, na
+primeira mensagem depois de um fork (workers do gunicorn com preload), como
+as demais threads de fundo da aplicação.
+
+Mensagens com `extra={'chave': ...}` passam por limite de taxa por chave:
+até `limite_por_chave` por janela e, depois disso, só 1 a cada `amostragem`.
+A próxima mensagem emitida de uma chave informa quantas foram suprimidas.
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+# Atributos padrão de LogRecord; o restante vira campo extra no JSON
+_ATRIBUTOS_PADRAO = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class FormatadorJSON(logging.Formatter):
+    def format(self, record):
+        dados = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for chave, valor in vars(record).items():
+            if chave not in _ATRIBUTOS_PADRAO:
+                dados[chave] = valor
+        if record.exc_info:
+            dados['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            dados['exc'] = record.exc_text
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+class FiltroAmostragem(logging.Filter):
+    def __init__(self, limite_por_chave: int = 10, janela: float = 60.0, amostragem: int = 100):
+        super().__init__()
+        self.limite = limite_por_chave
+        self.janela = janela
+        self.amostragem = max(1, amostragem)
+        self._estado = {}  # chave -> [inicio_janela, emitidas, vistas_apos_limite, suprimidas]
+        self._lock = threading.Lock()
+        self.suprimidas_total = 0
+
+    def filter(self, record):
+        chave = getattr(record, 'chave', None)
+        if chave is None:
+            return True
+        agora = time.monotonic()
+        with self._lock:
+            estado = self._estado.get(chave)
+            if estado is None or agora - estado[0] >= self.janela:
+                suprimidas = estado[3] if estado else 0
+                estado = self._estado[chave] = [agora, 0, 0, suprimidas]
+            if estado[1] < self.limite:
+                estado[1] += 1
+            else:
+                estado[2] += 1
+                if estado[2] % self.amostragem:
+                    estado[3] += 1
+                    self.suprimidas_total += 1
+                    return False
+                record.amostrada = self.amostragem
+            if estado[3]:
+                record.suprimidas = estado[3]
+                estado[3] = 0
+        return True
+
+
+class QueueHandlerSemBloqueio(logging.handlers.QueueHandler):
+    def __init__(self, fila, saida=None):
+        super().__init__(fila)
+        self.saida = saida
+        self.descartadas = 0
+        self.listener = None
+        self._pid = None
+        self._lock_listener = threading.Lock()
+
+    def garantir_listener(self):
+        # Uma thread escritora por processo; depois de um fork a do processo pai não existe no filho
+        if self._pid == os.getpid() or self.saida is None:
+            return
+        with self._lock_listener:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                # Fila herdada do pai: o que estiver nela já é escrito por ele
+                self.queue = queue.Queue(maxsize=self.queue.maxsize)
+            self.listener = logging.handlers.QueueListener(self.queue, self.saida, respect_handler_level=True)
+            self.listener.start()
+            self._pid = os.getpid()
+            atexit.register(self.listener.stop)
+
+    def prepare(self, record):
+        # Resolve mensagem e traceback aqui (o record precisa ser serializável),
+        # mas mantém o traceback separado para o formatador JSON
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        self.garantir_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartadas += 1
+
+
+_estado_global = {}
+
+
+def configurar_logging(app, destino=None, json_saida: bool = True, tamanho_fila: int = 10000,
+                       limite_por_chave: int = 10, janela: float = 60.0, amostragem: int = 100,
+                       nivel=logging.INFO):
+    """Configura o pipeline em `app.logger`. `destino`: caminho de arquivo ou None para stdout."""
+    saida = logging.FileHandler(destino, encoding='utf-8') if destino else logging.StreamHandler(sys.stdout)
+    saida.setFormatter(FormatadorJSON() if json_saida else logging.Formatter(
+        '[%(asctime)s] %(levelname)s in %(module)s: %(message)s'))
+
+    handler_fila = QueueHandlerSemBloqueio(queue.Queue(maxsize=tamanho_fila), saida)
+    filtro = FiltroAmostragem(limite_por_chave, janela, amostragem)
+    handler_fila.addFilter(filtro)
+    handler_fila.garantir_listener()
+
+    for handler in list(app.logger.handlers):
+        app.logger.removeHandler(handler)
+    app.logger.addHandler(handler_fila)
+    app.logger.setLevel(nivel)
+    app.logger.propagate = False
+
+    _estado_global.update(handler=handler_fila, filtro=filtro)
+    return handler_fila
+
+
+def contadores() -> dict:
+    """Mensagens descartadas (fila cheia), suprimidas pela amostragem e tamanho atual da fila."""
+    if not _estado_global:
+        return {}
+    return {
+        'descartadas': _estado_global['handler'].descartadas,
+        'suprimidas': _estado_global['filtro'].suprimidas_total,
+        'na_fila': _estado_global['handler'].queue.qsize(),
+    }
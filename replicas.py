@@ -0,0 +1,155 @@
+"""Separação de leitura/escrita com réplicas de leitura.
+
+Requisições GET/HEAD leem de uma réplica saudável; qualquer flush na sessão,
+requisições com outros métodos e código fora de requisição (CLI, worker da
+fila) usam o primário. Depois que um usuário grava algo, as requisições dele
+ficam presas ao primário por `janela_escrita` segundos (read-your-writes).
+
+A saúde das réplicas é verificada sob demanda, no máximo a cada
+`intervalo_checagem` segundos por processo: réplica fora do ar ou com atraso
+de replicação acima de `lag_maximo` é ignorada e a leitura volta ao primário.
+Se a réplica escolhida falhar no meio da requisição (OperationalError), a
+leitura é refeita no primário e o resto da requisição fica nele.
+"""
+import itertools
+import threading
+import time
+
+import sqlalchemy as sa
+from flask import current_app, g, has_request_context, request, session as flask_session
+from flask_sqlalchemy.session import Session
+
+METODOS_LEITURA = ('GET', 'HEAD', 'OPTIONS')
+
+# Atraso de replicação no PostgreSQL; 0 quando a réplica já aplicou tudo que recebeu
+# ou quando o servidor não é uma réplica
+_SQL_LAG_POSTGRES = sa.text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class RoteadorReplicas:
+    def __init__(self, app=None, db=None, lag_maximo: float = 5.0, intervalo_checagem: float = 5.0,
+                 janela_escrita: float = 10.0):
+        self.lag_maximo = lag_maximo
+        self.intervalo_checagem = intervalo_checagem
+        self.janela_escrita = janela_escrita
+        self.chaves = []
+        self._estado = {}  # chave -> (saudavel, verificado_em)
+        self._lock = threading.Lock()
+        self._ciclo = None
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        self.db = db
+        self.chaves = [chave for chave in app.config.get('SQLALCHEMY_BINDS', {}) if chave.startswith('replica')]
+        self._ciclo = itertools.cycle(self.chaves) if self.chaves else None
+        app.extensions['replicas'] = self
+        if not self.chaves:
+            return
+
+        with app.app_context():
+            for chave in self.chaves:
+                sa.event.listen(db.engines[chave], 'handle_error', self._ao_falhar(chave))
+
+        sa.event.listen(db.session, 'after_flush', self._ao_gravar)
+        app.before_request(self._antes_da_requisicao)
+        app.after_request(self._depois_da_requisicao)
+
+    def _ao_falhar(self, chave):
+        def marcar_fora(contexto):
+            # Erro de conexão numa réplica: deixa de usá-la até a próxima checagem
+            if contexto.is_disconnect or isinstance(contexto.original_exception, sa.exc.OperationalError):
+                self._estado[chave] = (False, time.monotonic())
+        return marcar_fora
+
+    def _ao_gravar(self, sessao, contexto_flush):
+        sessao.info['escreveu'] = True
+        if has_request_context():
+            g.escreveu_no_banco = True
+
+    def _antes_da_requisicao(self):
+        preso_ate = flask_session.get('_primario_ate', 0)
+        g.usar_replica = request.method in METODOS_LEITURA and preso_ate < time.time()
+
+    def _depois_da_requisicao(self, response):
+        if g.get('escreveu_no_banco'):
+            flask_session['_primario_ate'] = time.time() + self.janela_escrita
+        return response
+
+    def _saudavel(self, chave) -> bool:
+        saudavel, verificado_em = self._estado.get(chave, (False, None))
+        if verificado_em is not None and time.monotonic() - verificado_em < self.intervalo_checagem:
+            return saudavel
+        with self._lock:
+            saudavel, verificado_em = self._estado.get(chave, (False, None))
+            if verificado_em is None or time.monotonic() - verificado_em >= self.intervalo_checagem:
+                saudavel = self._verificar(chave)
+                self._estado[chave] = (saudavel, time.monotonic())
+        return saudavel
+
+    def _verificar(self, chave) -> bool:
+        engine = self.db.engines[chave]
+        try:
+            with engine.connect() as conexao:
+                if engine.dialect.name == 'postgresql':
+                    lag = conexao.execute(_SQL_LAG_POSTGRES).scalar() or 0
+                    return float(lag) <= self.lag_maximo
+                conexao.execute(sa.text('SELECT 1'))
+                return True
+        except Exception:
+            current_app.logger.warning(f"Réplica '{chave}' indisponível; lendo do primário.")
+            return False
+
+    def escolher(self):
+        """Engine de uma réplica saudável (rodízio), ou None para usar o primário."""
+        for _ in range(len(self.chaves)):
+            chave = next(self._ciclo)
+            if self._saudavel(chave):
+                return self.db.engines[chave]
+        return None
+
+
+class SessaoRoteada(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and not self.info.get('escreveu')
+                and not isinstance(clause, sa.UpdateBase)
+                and has_request_context() and g.get('usar_replica')):
+            # A réplica escolhida vale para a sessão inteira, para as leituras serem consistentes
+            if 'replica' not in self.info:
+                roteador = current_app.extensions.get('replicas')
+                self.info['replica'] = roteador.escolher() if roteador else None
+            if self.info['replica'] is not None:
+                return self.info['replica']
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def execute(self, statement, *args, **kwargs):
+        return self._com_fallback(statement, super().execute, statement, *args, **kwargs)
+
+    def ler_na_conexao(self, statement, parametros=None):
+        """Executa `statement` direto na conexão da sessão (sem a camada ORM), com o mesmo fallback."""
+        return self._com_fallback(statement, lambda: self.connection().execute(statement, parametros).all())
+
+    def _com_fallback(self, statement, executar, *args, **kwargs):
+        try:
+            return executar(*args, **kwargs)
+        except sa.exc.OperationalError:
+            if not self._lendo_da_replica(statement):
+                raise
+            # A réplica caiu (ou foi promovida/reiniciada) no meio da requisição: só houve leitura,
+            # então descartar a transação e repetir no primário não perde nada
+            current_app.logger.warning('Falha na réplica durante a requisição; repetindo a leitura no primário.',
+                                       exc_info=True)
+            try:
+                self.rollback()
+            except sa.exc.DBAPIError:
+                pass
+            self.info['replica'] = None
+            return executar(*args, **kwargs)
+
+    def _lendo_da_replica(self, statement) -> bool:
+        return (self.info.get('replica') is not None and not self.info.get('escreveu')
+                and not isinstance(statement, sa.UpdateBase)
+                and has_request_context() and g.get('usar_replica'))
@@ -0,0 +1,89 @@
+"""Snapshot do usuário guardado na sessão (cookie assinado pelo Flask).
+
+Com o modo ativo, o `user_loader` devolve um `UsuarioSnapshot` com os campos
+usados pelas telas, sem consultar a tabela de usuários a cada requisição.
+O snapshot carrega a `versao_sessao` do usuário; a versão atual de cada
+usuário fica num cache do processo, esvaziado pelo barramento de invalidação
+(`invalidacao.py`) quando o usuário muda; o TTL só cobre avisos perdidos.
+"""
+import threading
+import time
+
+from flask_login import UserMixin
+
+CHAVE_SESSAO = '_usuario_snapshot'
+
+
+class UsuarioSnapshot(UserMixin):
+    def __init__(self, id, nome, email, tem_chave_esp32, versao, admin=False):
+        self.id = id
+        self.nome = nome
+        self.email = email
+        self.tem_chave_esp32 = tem_chave_esp32
+        self.versao = versao
+        self.admin = admin
+
+    @classmethod
+    def do_usuario(cls, usuario):
+        return cls(usuario.id, usuario.nome, usuario.email, bool(usuario.esp32_api_key), usuario.versao_sessao,
+                   bool(usuario.admin))
+
+    @classmethod
+    def da_sessao(cls, dados):
+        try:
+            return cls(int(dados['id']), dados['nome'], dados['email'], bool(dados['chave']), int(dados['versao']),
+                       bool(dados.get('admin')))
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def para_sessao(self):
+        return {'id': self.id, 'nome': self.nome, 'email': self.email,
+                'chave': self.tem_chave_esp32, 'versao': self.versao, 'admin': self.admin}
+
+    def get_id(self):
+        return str(self.id)
+
+    def __repr__(self):
+        return f"UsuarioSnapshot('{self.nome}', '{self.email}', v{self.versao})"
+
+
+class CacheVersoes:
+    """Versão atual de cada usuário, por processo, com TTL.
+
+    Uma leitura do banco pode terminar depois de uma invalidação do mesmo
+    usuário (e trazer a versão antiga). Cada invalidação avança `_geracao`;
+    o valor lido só entra no cache se a geração não mudou durante a leitura.
+    """
+
+    def __init__(self, ttl: float = 60.0):
+        self.ttl = ttl
+        self._versoes = {}
+        self._geracao = 0
+        self._lock = threading.Lock()
+
+    def obter(self, usuario_id, carregar):
+        agora = time.monotonic()
+        with self._lock:
+            item = self._versoes.get(usuario_id)
+            geracao = self._geracao
+        if item is not None and item[1] > agora:
+            return item[0]
+        versao = carregar(usuario_id)
+        with self._lock:
+            if self._geracao == geracao:
+                self._versoes[usuario_id] = (versao, time.monotonic() + self.ttl)
+        return versao
+
+    def definir(self, usuario_id, versao):
+        with self._lock:
+            self._versoes[usuario_id] = (versao, time.monotonic() + self.ttl)
+
+    def invalidar(self, usuario_id):
+        with self._lock:
+            self._geracao += 1
+            self._versoes.pop(usuario_id, None)
+
+    def limpar(self):
+        with self._lock:
+            self._geracao += 1
+            self._versoes.clear()
@@ -0,0 +1,113 @@
+"""Perfil de SQLite para instalações de um único servidor.
+
+Com as configurações padrão o SQLite serializa leitores e escritores e, com
+vários workers do gunicorn, as escritas falham com "database is locked". Este
+perfil, aplicado a cada conexão nova:
+
+- liga o journal WAL (leitores não bloqueiam o escritor nem vice-versa),
+  `synchronous=NORMAL`, `mmap_size`, cache maior e `busy_timeout`;
+- assume o controle das transações: todas abrem adiadas (BEGIN) e só pedem
+  a escrita no primeiro INSERT/UPDATE/DELETE, inclusive nas requisições
+  POST/PUT/DELETE. Assim o hash do bcrypt no login, a leitura de uma folha
+  de respostas e qualquer outro trabalho de CPU antes da primeira escrita não
+  seguram a vez de escrever. Uma transação adiada que lê e depois grava pode
+  falhar com "database is locked" se outro processo gravou no meio; os
+  caminhos em que isso importa reservam a escrita desde o BEGIN IMMEDIATE com
+  `execution_options(escrita=True)` (na sessão:
+  `db.session.connection(execution_options={'escrita': True})`);
+- passa as transações de escrita por uma fila de escritor único por processo,
+  para que as threads esperem num lock em vez de disputarem o lock do arquivo
+  com o busy handler do SQLite. Transações adiadas entram na fila antes do
+  primeiro comando de escrita. A fila é reentrante: uma thread que já tem a
+  vez e abre outra conexão de escrita não espera por si mesma. Entre
+  processos, a escrita espera até `busy_timeout`.
+
+Funções extras de configuração por conexão podem ser registradas com
+`@sqlite.ao_conectar`.
+"""
+import re
+import threading
+
+from sqlalchemy import event
+
+PRAGMAS_PADRAO = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,           # ms
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -20000,           # negativo = KiB
+    'temp_store': 'MEMORY',
+}
+
+
+_ESCRITA = re.compile(r'^\s*(INSERT|UPDATE|DELETE|REPLACE|CREATE|DROP|ALTER)\b', re.IGNORECASE)
+
+
+def opcoes_engine(busy_timeout_ms: int = 5000) -> dict:
+    """Opções para SQLALCHEMY_ENGINE_OPTIONS; precisam estar na config antes de criar o SQLAlchemy."""
+    return {'connect_args': {'timeout': busy_timeout_ms / 1000.0, 'check_same_thread': False}}
+
+
+class SQLiteEmbarcado:
+    def __init__(self, app=None, db=None, pragmas=None):
+        self.pragmas = dict(PRAGMAS_PADRAO, **(pragmas or {}))
+        self.hooks = []
+        self._fila_escrita = threading.RLock()
+        self.engines = []
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        self.pragmas.update(app.config.get('SQLITE_PRAGMAS') or {})
+        self.espera_escrita = self.pragmas['busy_timeout'] / 1000.0
+        app.extensions['sqlite_embarcado'] = self
+        with app.app_context():
+            self.engines = [engine for engine in db.engines.values() if engine.dialect.name == 'sqlite']
+        for engine in self.engines:
+            event.listen(engine, 'connect', self._ao_conectar)
+            event.listen(engine, 'begin', self._ao_iniciar)
+            event.listen(engine, 'before_cursor_execute', self._antes_de_executar)
+            event.listen(engine, 'commit', self._ao_encerrar)
+            event.listen(engine, 'rollback', self._ao_encerrar)
+
+    def ao_conectar(self, funcao):
+        """Decorador: `funcao(conexao_dbapi)` roda em cada conexão nova, depois dos PRAGMAs."""
+        self.hooks.append(funcao)
+        return funcao
+
+    def _ao_conectar(self, conexao_dbapi, registro):
+        # Sem o BEGIN implícito do driver; quem abre as transações é _ao_iniciar
+        conexao_dbapi.isolation_level = None
+        cursor = conexao_dbapi.cursor()
+        for nome, valor in self.pragmas.items():
+            cursor.execute(f'PRAGMA {nome}={valor}')
+        cursor.close()
+        for funcao in self.hooks:
+            funcao(conexao_dbapi)
+
+    def _ao_iniciar(self, conexao):
+        if not conexao.get_execution_options().get('escrita'):
+            conexao.exec_driver_sql('BEGIN')
+            return
+        self._entrar_na_fila(conexao)
+        try:
+            conexao.exec_driver_sql('BEGIN IMMEDIATE')
+        except Exception:
+            self._ao_encerrar(conexao)
+            raise
+
+    def _antes_de_executar(self, conexao, cursor, sql, parametros, contexto, varios):
+        # Transação adiada que vai escrever: pega a vez de escrever antes do primeiro comando de escrita
+        if not conexao.info.get('fila_escrita') and _ESCRITA.match(sql):
+            self._entrar_na_fila(conexao)
+
+    def _entrar_na_fila(self, conexao):
+        # Se a fila não andar dentro do busy_timeout, segue e deixa o SQLite decidir
+        if self._fila_escrita.acquire(timeout=self.espera_escrita):
+            conexao.info['fila_escrita'] = True
+
+    def _ao_encerrar(self, conexao):
+        # Chamado logo antes do COMMIT/ROLLBACK; o próximo escritor ainda pode esperar
+        # alguns instantes no busy_timeout enquanto este termina
+        if conexao.info.pop('fila_escrita', False):
+            self._fila_escrita.release()
@@ -0,0 +1,88 @@
+// static/js/leitura_gabaritos.js
+
+const statusLoteNome = {
+    recebido: 'Na fila',
+    processando: 'Processando',
+    concluido: 'Concluído',
+    erro: 'Erro'
+};
+
+function mostrarProgressoLote(lote) {
+    const barra = document.getElementById('barraLote');
+    const status = document.getElementById('statusLote');
+    const percentual = lote.total_paginas > 0 ? Math.round(100 * lote.processadas / lote.total_paginas) : 0;
+
+    document.getElementById('progressoLote').style.display = 'block';
+    barra.style.width = `${percentual}%`;
+    barra.textContent = `${percentual}%`;
+    barra.classList.toggle('bg-danger', lote.status === 'erro');
+    barra.classList.toggle('bg-success', lote.status === 'concluido');
+
+    let texto = `${statusLoteNome[lote.status] || lote.status}: ${lote.processadas} de ${lote.total_paginas} páginas`;
+    if (lote.falhas > 0) {
+        texto += ` (${lote.falhas} com falha)`;
+    }
+    if (lote.mensagem) {
+        texto += ` - ${lote.mensagem}`;
+    }
+    status.textContent = texto;
+
+    if (lote.status === 'concluido') {
+        const link = document.createElement('a');
+        link.href = `/leitura_gabaritos/lotes/${lote.id}/resultados`;
+        link.className = 'ms-2';
+        link.textContent = 'Ver resultados';
+        status.appendChild(link);
+    }
+}
+
+function acompanharLote(loteId) {
+    fetch(`/leitura_gabaritos/lotes/${loteId}`)
+        .then(response => response.json())
+        .then(lote => {
+            mostrarProgressoLote(lote);
+            if (lote.status === 'recebido' || lote.status === 'processando') {
+                setTimeout(() => acompanharLote(loteId), 2000);
+            }
+        })
+        .catch(error => {
+            console.error('Erro ao consultar o lote:', error);
+            setTimeout(() => acompanharLote(loteId), 5000);
+        });
+}
+
+document.getElementById('formLote').addEventListener('submit', function(event) {
+    event.preventDefault();
+    const arquivo = document.getElementById('arquivoLote').files[0];
+    if (!arquivo) {
+        return;
+    }
+    const params = new URLSearchParams({
+        nome: arquivo.name,
+        questoes: document.getElementById('questoesLote').value,
+        alternativas: document.getElementById('alternativasLote').value
+    });
+
+    document.getElementById('statusLote').textContent = 'Enviando arquivo...';
+    document.getElementById('progressoLote').style.display = 'block';
+
+    // O arquivo vai como corpo da requisição para o servidor gravá-lo direto em disco
+    fetch(`/leitura_gabaritos/lotes?${params}`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/octet-stream' },
+        body: arquivo
+    })
+        .then(response => response.json())
+        .then(data => {
+            if (!data.sucesso) {
+                document.getElementById('statusLote').textContent = data.erro;
+                return;
+            }
+            mostrarProgressoLote(data.lote);
+            acompanharLote(data.lote.id);
+        })
+        .catch(error => {
+            console.error('Erro ao enviar o lote:', error);
+            document.getElementById('statusLote').textContent = 'Erro ao enviar o lote.';
+        });
+});
@@ -0,0 +1,227 @@
+"""Fila de tarefas durável sobre o próprio banco de dados.
+
+As tarefas ficam numa tabela e são executadas por um processo separado
+(`flask tarefas-worker`), nunca dentro da requisição. No PostgreSQL os workers
+reivindicam lotes com SELECT ... FOR UPDATE SKIP LOCKED; nos demais bancos
+(SQLite) a reivindicação é um único UPDATE condicional, serializado pelo
+próprio banco, com um lock local para manter um único escritor por processo.
+Falhas são repetidas com backoff exponencial até `max_tentativas`.
+
+Cada reivindicação grava um token em `bloqueado_por`. Enquanto a tarefa roda,
+o laço do worker renova `bloqueado_em` a cada `renovacao` segundos, então só
+tarefas de workers mortos passam do `tempo_limite` e são reivindicadas de
+novo. Toda escrita de `executar` é condicionada ao token: um worker que perdeu
+a tarefa para outro não sobrescreve o resultado do novo dono.
+
+Tarefas enfileiradas com `unica=True` têm no máximo uma pendente por tipo
+(índice único parcial no modelo). Se uma delas falhar quando já existe outra
+pendente do mesmo tipo, a nova tentativa é descartada: a pendente a substitui.
+"""
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, bindparam, or_, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+PENDENTE = 'pendente'
+EXECUTANDO = 'executando'
+CONCLUIDA = 'concluida'
+FALHOU = 'falhou'
+
+
+class TarefaPerdida(Exception):
+    """A tarefa deixou de pertencer a este worker (outro a reivindicou depois do tempo limite)."""
+
+
+class FilaTarefas:
+    def __init__(self, db, modelo, backoff_base: float = 10.0, backoff_max: float = 3600.0,
+                 tempo_limite: float = 1800.0, renovacao: float = None):
+        self.db = db
+        self.modelo = modelo
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # Tarefas "executando" há mais tempo que isso são consideradas abandonadas (worker morreu)
+        self.tempo_limite = timedelta(seconds=tempo_limite)
+        # Renovação bem abaixo do tempo limite: um atraso do laço não basta para a tarefa parecer abandonada
+        self.renovacao = renovacao if renovacao is not None else tempo_limite / 6
+        self.handlers = {}
+        self._lock_escrita = threading.Lock()
+
+    def tarefa(self, tipo: str):
+        """Decorador que registra a função que executa as tarefas de `tipo`."""
+        def registrar(funcao):
+            self.handlers[tipo] = funcao
+            return funcao
+        return registrar
+
+    def enfileirar(self, tipo: str, max_tentativas: int = 5, executar_em=None, unica: bool = False, **payload):
+        """Adiciona a tarefa à sessão atual; ela é gravada junto com o commit de quem chamou.
+
+        Com `unica=True`, gravar uma segunda tarefa pendente do mesmo tipo levanta IntegrityError.
+        """
+        if tipo not in self.handlers:
+            raise ValueError(f'Tipo de tarefa desconhecido: {tipo}')
+        tarefa = self.modelo(tipo=tipo, payload=payload, max_tentativas=max_tentativas,
+                             executar_em=executar_em or datetime.utcnow(), unica=unica)
+        self.db.session.add(tarefa)
+        return tarefa
+
+    def _disponiveis(self, agora):
+        Tarefa = self.modelo
+        return or_(
+            and_(Tarefa.status == PENDENTE, Tarefa.executar_em <= agora),
+            and_(Tarefa.status == EXECUTANDO, Tarefa.bloqueado_em < agora - self.tempo_limite),
+        )
+
+    def reivindicar(self, limite: int, worker: str):
+        """Marca até `limite` tarefas disponíveis como executando para `worker`; retorna (token, ids)."""
+        Tarefa = self.modelo
+        session = self.db.session
+        agora = datetime.utcnow()
+        token = f'{worker}:{uuid.uuid4().hex[:8]}'
+
+        if session.get_bind().dialect.name == 'postgresql':
+            ids = session.execute(
+                select(Tarefa.id).where(self._disponiveis(agora))
+                .order_by(Tarefa.executar_em).limit(limite)
+                .with_for_update(skip_locked=True)
+            ).scalars().all()
+            if ids:
+                session.execute(
+                    update(Tarefa).where(Tarefa.id.in_(ids))
+                    .values(status=EXECUTANDO, bloqueado_em=agora, bloqueado_por=token)
+                )
+            session.commit()
+            return token, ids
+
+        with self._lock_escrita:
+            candidatas = (select(Tarefa.id).where(self._disponiveis(agora))
+                          .order_by(Tarefa.executar_em).limit(limite).scalar_subquery())
+            session.execute(
+                update(Tarefa).where(Tarefa.id.in_(candidatas))
+                .values(status=EXECUTANDO, bloqueado_em=agora, bloqueado_por=token)
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+        return token, session.execute(select(Tarefa.id).where(Tarefa.bloqueado_por == token)).scalars().all()
+
+    def renovar(self, tarefas):
+        """Renova `bloqueado_em` das tarefas (pares (id, token)) que ainda pertencem a quem as reivindicou."""
+        if not tarefas:
+            return
+        tabela = self.modelo.__table__
+        session = self.db.session
+        with self._lock_escrita:
+            # Pela tabela (Core): uma lista de parâmetros em update(modelo) viraria o bulk update do ORM
+            session.execute(
+                update(tabela)
+                .where(tabela.c.id == bindparam('b_id'), tabela.c.bloqueado_por == bindparam('b_token'),
+                       tabela.c.status == EXECUTANDO)
+                .values(bloqueado_em=datetime.utcnow()),
+                [{'b_id': tarefa_id, 'b_token': token} for tarefa_id, token in tarefas],
+            )
+            session.commit()
+
+    def _atualizar_se_dono(self, tarefa_id: int, token: str, **valores) -> bool:
+        """UPDATE condicionado ao token; False se a tarefa foi reivindicada por outro worker."""
+        Tarefa = self.modelo
+        resultado = self.db.session.execute(
+            update(Tarefa)
+            .where(Tarefa.id == tarefa_id, Tarefa.bloqueado_por == token, Tarefa.status == EXECUTANDO)
+            .values(**valores)
+            .execution_options(synchronize_session=False)
+        )
+        self.db.session.commit()
+        return resultado.rowcount == 1
+
+    def executar(self, tarefa_id: int, token: str):
+        """Executa uma tarefa reivindicada com `token` e registra sucesso, nova tentativa ou falha."""
+        Tarefa = self.modelo
+        session = self.db.session
+        if not self._atualizar_se_dono(tarefa_id, token, tentativas=Tarefa.tentativas + 1):
+            return False
+        tarefa = session.execute(
+            select(Tarefa.tipo, Tarefa.payload, Tarefa.tentativas, Tarefa.max_tentativas).where(Tarefa.id == tarefa_id)
+        ).one()
+        session.commit()
+        try:
+            self.handlers[tarefa.tipo](**(tarefa.payload or {}))
+        except Exception:
+            session.rollback()
+            valores = {'erro': traceback.format_exc()[-2000:], 'bloqueado_por': None}
+            if tarefa.tentativas < tarefa.max_tentativas:
+                espera = min(self.backoff_max, self.backoff_base * 2 ** (tarefa.tentativas - 1))
+                valores.update(status=PENDENTE, executar_em=datetime.utcnow() + timedelta(seconds=espera))
+            else:
+                valores.update(status=FALHOU)
+            try:
+                self._registrar_fim(tarefa_id, token, valores)
+            except IntegrityError:
+                # Tarefa única e já há outra pendente do mesmo tipo: ela faz as vezes da nova tentativa
+                session.rollback()
+                valores.pop('executar_em')
+                valores['status'] = FALHOU
+                self._registrar_fim(tarefa_id, token, valores)
+            return False
+        return self._registrar_fim(tarefa_id, token, {'status': CONCLUIDA, 'erro': None, 'bloqueado_por': None})
+
+    def _registrar_fim(self, tarefa_id: int, token: str, valores: dict) -> bool:
+        if self._atualizar_se_dono(tarefa_id, token, **valores):
+            return valores['status'] == CONCLUIDA
+        # Passou do tempo limite sem renovação e outro worker assumiu: o resultado é dele
+        self.db.session.rollback()
+        raise TarefaPerdida(f'A tarefa {tarefa_id} foi reivindicada por outro worker antes de terminar.')
+
+    def rodar_worker(self, app, concorrencia: int = 4, lote: int = 10, intervalo: float = 2.0, parar=None):
+        """Laço principal do worker: reivindica em lotes e executa até `concorrencia` tarefas ao mesmo tempo."""
+        worker = f'{uuid.uuid4().hex[:8]}'
+        parar = parar or threading.Event()
+        em_execucao = {}  # tarefa_id -> token
+        trava = threading.Lock()
+        renovada_em = time.monotonic()
+
+        def executar_no_contexto(tarefa_id, token):
+            try:
+                with app.app_context():
+                    self.executar(tarefa_id, token)
+            except Exception:
+                app.logger.exception(f'Erro ao executar a tarefa {tarefa_id}')
+            finally:
+                with trava:
+                    em_execucao.pop(tarefa_id, None)
+
+        with ThreadPoolExecutor(max_workers=concorrencia) as pool:
+            while not parar.is_set():
+                if time.monotonic() - renovada_em >= self.renovacao:
+                    with trava:
+                        ativas = list(em_execucao.items())
+                    try:
+                        with app.app_context():
+                            self.renovar(ativas)
+                    except Exception:
+                        app.logger.exception('Erro ao renovar as tarefas em execução')
+                    renovada_em = time.monotonic()
+                with trava:
+                    livres = concorrencia - len(em_execucao)
+                ids = []
+                if livres > 0:
+                    with app.app_context():
+                        try:
+                            token, ids = self.reivindicar(min(livres, lote), worker)
+                        except SQLAlchemyError:
+                            # Falha passageira (banco travado, conexão caída): tenta de novo depois do intervalo
+                            self.db.session.rollback()
+                            app.logger.exception('Erro ao reivindicar tarefas')
+                            parar.wait(intervalo)
+                            continue
+                    with trava:
+                        em_execucao.update((tarefa_id, token) for tarefa_id in ids)
+                    for tarefa_id in ids:
+                        pool.submit(executar_no_contexto, tarefa_id, token)
+                if not ids:
+                    # Sem vaga, espera pouco; sem tarefas, espera o intervalo de polling
+                    parar.wait(min(self.renovacao, intervalo) if livres > 0 else 0.2)
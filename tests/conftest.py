@@ -0,0 +1,34 @@
+"""Configuração comum dos testes: a aplicação sobre um banco SQLite temporário.
+
+As variáveis de ambiente precisam estar definidas antes do primeiro `import app`,
+porque a configuração é lida na importação. Tudo o que a aplicação grava em
+disco (banco, pasta instance/, baldes do rate limit, lotes) fica na pasta
+temporária do pytest, nunca na árvore do projeto.
+"""
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+
+@pytest.fixture(scope='session')
+def aplicacao(tmp_path_factory):
+    pasta = tmp_path_factory.mktemp('aplicacao')
+    os.environ['DATABASE_URL'] = f"sqlite:///{pasta / 'testes.db'}"
+    os.environ['INSTANCE_PATH'] = str(pasta / 'instance')
+    os.environ['ESP32_RATE_LIMIT_ARQUIVO'] = str(pasta / 'esp32_rate_limit.bin')
+    os.environ['ESP32_FALHAS_ARQUIVO'] = str(pasta / 'esp32_rate_limit_falhas.bin')
+    os.environ['GABARITOS_DIR'] = str(pasta / 'lotes')
+    os.environ['GABARITOS_BLOBS_DIR'] = str(pasta / 'blobs')
+    os.environ['LOG_ARQUIVO'] = os.devnull
+    os.environ.pop('DATABASE_REPLICA_URLS', None)
+    import app
+
+    with app.app.app_context():
+        app.db.create_all()
+    yield app
+    with app.app.app_context():
+        app.db.drop_all()
@@ -0,0 +1,77 @@
+"""O caminho Core de `consultas.py` devolve o mesmo que o caminho ORM que ele substituiu."""
+import random
+from datetime import datetime, timedelta, time as hora
+
+import pytest
+
+import agenda
+from consultas import ConsultasORM, horarios_para_json
+from escalonamento import Restricao
+
+USUARIOS = 80
+
+
+@pytest.fixture(scope='module')
+def banco(aplicacao):
+    """Usuários com 0 a 12 horários variados; 1 em cada 10 sem chave, alguns com restrição e fuso."""
+    rng = random.Random(0)
+    dias = list(agenda.DIAS_SEMANA)
+    db = aplicacao.db
+    with aplicacao.app.app_context():
+        for i in range(USUARIOS):
+            usuario = aplicacao.Usuario(nome=f'u{i}', email=f'u{i}@teste', senha_hash='x',
+                                        esp32_api_key=f'chave{i:05d}' if i % 10 else None,
+                                        max_zonas_simultaneas=rng.choice([None, 1, 2]),
+                                        vazao_maxima_l_min=rng.choice([None, 20.0]),
+                                        fuso_horario=rng.choice([None, 'America/Manaus']))
+            db.session.add(usuario)
+            db.session.flush()
+            for _ in range(rng.choice([0, 1, 3, 6, 12])):
+                db.session.add(aplicacao.Horario(hora=hora(rng.randrange(24), rng.randrange(60)),
+                                                 duracao=rng.randrange(1, 180),
+                                                 dias_semana=','.join(rng.sample(dias, rng.randrange(1, 8))),
+                                                 vazao_l_min=rng.choice([None, 8.0]),
+                                                 ativo=rng.random() < 0.8,
+                                                 usuario_id=usuario.id))
+        db.session.commit()
+        ids = [u.id for u in aplicacao.Usuario.query.order_by(aplicacao.Usuario.id)]
+    return ids
+
+
+@pytest.fixture
+def contexto(aplicacao, banco):
+    with aplicacao.app.test_request_context():
+        yield aplicacao
+        aplicacao.db.session.remove()
+
+
+def chaves():
+    return [f'chave{i:05d}' for i in range(USUARIOS) if i % 10] + ['inexistente']
+
+
+@pytest.mark.parametrize('chave', chaves())
+def test_horarios_do_dispositivo_igual_ao_orm(contexto, chave):
+    orm, rapidas = ConsultasORM(contexto.Usuario, contexto.Horario), contexto.consultas_rapidas
+    usuario_orm, restricao_orm, fuso_orm, horarios_orm = orm.horarios_do_dispositivo(chave)
+    usuario_core, restricao_core, fuso_core, horarios_core = rapidas.horarios_do_dispositivo(chave)
+    assert (usuario_core, restricao_core, fuso_core) == (usuario_orm, restricao_orm, fuso_orm)
+
+    intervalos_orm = list(agenda.intervalos_semana(horarios_orm))
+    intervalos_core = list(agenda.intervalos_semana(horarios_core))
+    for minutos in range(0, 7 * 24 * 60, 97):
+        instante = datetime(2024, 1, 1) + timedelta(minutes=minutos)
+        assert agenda.deve_regar(horarios_core, instante) == agenda.deve_regar(horarios_orm, instante)
+        assert (contexto.intervalo_proxima_consulta(chave, intervalos_core, instante)
+                == contexto.intervalo_proxima_consulta(chave, intervalos_orm, instante))
+
+
+def test_chave_inexistente(contexto):
+    assert contexto.consultas_rapidas.horarios_do_dispositivo('inexistente') == (None, Restricao(), None, [])
+
+
+def test_api_horarios_igual_ao_orm_ordenado_por_id(contexto, banco):
+    # O ORM não ordenava; o caminho Core devolve os horários sempre pela ordem do id
+    orm, rapidas = ConsultasORM(contexto.Usuario, contexto.Horario), contexto.consultas_rapidas
+    for usuario_id in banco:
+        esperado = horarios_para_json(sorted(orm.horarios_ativos(usuario_id), key=lambda h: h.id))
+        assert horarios_para_json(rapidas.horarios_ativos(usuario_id)) == esperado